@@ -0,0 +1,66 @@
+"""Response cache for LLM calls."""
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from utils.logger import logger
+
+
+class ResponseCache:
+    """LRU cache for chat completions keyed by normalized prompt.
+
+    Repeated or near-identical single-turn prompts (the risk detector sees
+    many "спасибо" / "ok" style messages) skip the network call entirely.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, Tuple[str, Dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        messages: List[Dict[str, str]],
+        json_mode: bool,
+        temperature: Optional[float]
+    ) -> str:
+        """
+        Build a cache key from the request parameters.
+
+        Only the system prompt and the last user message determine the
+        response for the single-turn calls we cache (detector, memory
+        summaries), so any longer history is deliberately ignored. The user
+        text is normalized (stripped, lowercased) so trivial paraphrases of
+        short confirmations collapse to the same key.
+        """
+        system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+        last_user = next(
+            (m['content'] for m in reversed(messages) if m['role'] == 'user'), ''
+        )
+        temp_bucket = round(temperature, 1) if temperature is not None else None
+        raw = f"{system}\x00{last_user.strip().lower()}\x00{json_mode}\x00{temp_bucket}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict]]:
+        """Look up a cached (content, usage) pair, refreshing its LRU slot."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, content: str, usage: Dict) -> None:
+        """Store a completion, evicting the least recently used entry if full."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = (content, usage)
+        if len(self._entries) > self.maxsize:
+            evicted_key, _ = self._entries.popitem(last=False)
+            logger.debug("Response cache evicted entry %s", evicted_key[:12])
+
+
+# Global response cache instance
+response_cache = ResponseCache()
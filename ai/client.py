@@ -2,9 +2,13 @@
 import time
 from typing import List, Dict, Optional, Tuple
 from uuid import UUID
+
+import httpx
 from openai import AsyncOpenAI
 
+from ai.cache import response_cache
 from config import config
+from utils.background import enqueue_db_write
 from utils.logger import logger
 from db.models import LLMRequestRepository
 
@@ -13,12 +17,32 @@ class AIClient:
     """OpenAI API client wrapper."""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        # Explicit connection pool: keep-alive amortizes TLS handshakes across
+        # requests and bounds socket usage under burst load. The pool is shared
+        # process-wide via the ai_client singleton below.
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=50,
+                keepalive_expiry=30.0
+            ),
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+        self.client = AsyncOpenAI(
+            api_key=config.OPENAI_API_KEY,
+            http_client=self.http_client
+        )
         self.model = config.OPENAI_MODEL
         self.max_tokens = config.OPENAI_MAX_TOKENS
         self.temperature = config.OPENAI_TEMPERATURE
-        
-        logger.info(f"AI Client initialized with model: {self.model}")
+
+        logger.info("AI Client initialized with model: %s", self.model)
+
+    async def aclose(self):
+        """Close the shared HTTP connection pool (called on bot shutdown)."""
+        await self.http_client.aclose()
+        logger.info("AI Client HTTP pool closed")
     
     async def chat_completion(
         self,
@@ -28,11 +52,12 @@ class AIClient:
         message_id: Optional[UUID] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
-        json_mode: bool = False
+        json_mode: bool = False,
+        use_cache: bool = False
     ) -> Tuple[str, Dict]:
         """
         Get chat completion from OpenAI.
-        
+
         Args:
             messages: List of message dicts with role and content
             user_id: User UUID for logging
@@ -41,12 +66,24 @@ class AIClient:
             max_tokens: Override default max tokens
             temperature: Override default temperature
             json_mode: Force JSON response format
-            
+            use_cache: Serve repeated prompts from the response cache
+                (only safe for single-turn calls like the detector)
+
         Returns:
             Tuple of (response_content, usage_stats)
         """
         start_time = time.time()
-        
+
+        # Check response cache before going to the network
+        cache_key = None
+        if use_cache:
+            cache_key = response_cache.make_key(messages, json_mode, temperature)
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                content, usage_stats = cached
+                logger.info("AI completion served from response cache")
+                return content, {**usage_stats, "cached": True}
+
         try:
             # Prepare request parameters
             request_params = {
@@ -71,8 +108,9 @@ class AIClient:
             latency_ms = int((time.time() - start_time) * 1000)
             cost_usd = self._calculate_cost(usage.prompt_tokens, usage.completion_tokens)
             
-            # Log request
-            await LLMRequestRepository.create(
+            # Log request off the critical path
+            enqueue_db_write(
+                LLMRequestRepository.create,
                 user_id=user_id,
                 session_id=session_id,
                 message_id=message_id,
@@ -86,22 +124,28 @@ class AIClient:
                 status="success"
             )
             
-            logger.info(f"AI completion successful - tokens: {usage.total_tokens}, latency: {latency_ms}ms")
-            
-            return content, {
+            logger.info("AI completion successful - tokens: %s, latency: %sms", usage.total_tokens, latency_ms)
+
+            usage_stats = {
                 "prompt_tokens": usage.prompt_tokens,
                 "completion_tokens": usage.completion_tokens,
                 "total_tokens": usage.total_tokens,
                 "latency_ms": latency_ms,
                 "cost_usd": cost_usd
             }
+
+            if cache_key is not None:
+                response_cache.put(cache_key, content, usage_stats)
+
+            return content, usage_stats
             
         except Exception as e:
             latency_ms = int((time.time() - start_time) * 1000)
-            logger.error(f"AI completion failed: {e}")
+            logger.error("AI completion failed: %s", e)
             
-            # Log error
-            await LLMRequestRepository.create(
+            # Log error off the critical path
+            enqueue_db_write(
+                LLMRequestRepository.create,
                 user_id=user_id,
                 session_id=session_id,
                 message_id=message_id,
@@ -115,6 +159,106 @@ class AIClient:
             
             raise
     
+    async def chat_completion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        user_id: Optional[UUID] = None,
+        session_id: Optional[UUID] = None,
+        message_id: Optional[UUID] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        usage_stats: Optional[Dict] = None
+    ):
+        """
+        Stream a chat completion from OpenAI, yielding content deltas.
+
+        The first token arrives after first-token latency instead of
+        full-generation latency. Usage is reported by the final stream chunk
+        and logged the same way as the non-streaming path.
+
+        Args:
+            messages: List of message dicts with role and content
+            user_id: User UUID for logging
+            session_id: Session UUID for logging
+            message_id: Message UUID for logging
+            max_tokens: Override default max tokens
+            temperature: Override default temperature
+            usage_stats: Optional dict filled in place with usage metrics
+                once the stream completes (async generators cannot return
+                a value to the caller)
+
+        Yields:
+            Content delta strings
+        """
+        start_time = time.time()
+
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens or self.max_tokens,
+                temperature=temperature or self.temperature,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+            usage = None
+            async for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+            latency_ms = int((time.time() - start_time) * 1000)
+
+            if usage:
+                cost_usd = self._calculate_cost(usage.prompt_tokens, usage.completion_tokens)
+
+                enqueue_db_write(
+                    LLMRequestRepository.create,
+                    user_id=user_id,
+                    session_id=session_id,
+                    message_id=message_id,
+                    provider="openai",
+                    model=self.model,
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    total_tokens=usage.total_tokens,
+                    latency_ms=latency_ms,
+                    cost_usd=cost_usd,
+                    status="success"
+                )
+
+                if usage_stats is not None:
+                    usage_stats.update({
+                        "prompt_tokens": usage.prompt_tokens,
+                        "completion_tokens": usage.completion_tokens,
+                        "total_tokens": usage.total_tokens,
+                        "latency_ms": latency_ms,
+                        "cost_usd": cost_usd
+                    })
+
+            logger.info("AI streaming completion finished - latency: %sms", latency_ms)
+
+        except Exception as e:
+            latency_ms = int((time.time() - start_time) * 1000)
+            logger.error("AI streaming completion failed: %s", e)
+
+            enqueue_db_write(
+                LLMRequestRepository.create,
+                user_id=user_id,
+                session_id=session_id,
+                message_id=message_id,
+                provider="openai",
+                model=self.model,
+                latency_ms=latency_ms,
+                status="error",
+                error_code=type(e).__name__,
+                error_message=str(e)
+            )
+
+            raise
+
     def _calculate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
         """
         Calculate approximate cost for GPT-4o-mini.
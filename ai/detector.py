@@ -1,17 +1,139 @@
 """Risk detection system."""
-import json
-from typing import Dict, Tuple
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from uuid import UUID
 
+import orjson
+
 from ai.client import ai_client
 from ai.prompts import prompt_manager
 from db.models import RiskEventRepository
+from utils.background import enqueue_db_write
 from utils.logger import logger
 
+# Curated crisis/distress keywords (ru/kz/en) — compiled once at import.
+# Deliberately broad: any hit always escalates to the LLM classifier.
+_CRISIS_KEYWORDS = [
+    # Russian (stems, so conjugated forms match: умру/умрём, прощай/прощальное)
+    r"суицид", r"самоубийств", r"покончить с собой", r"не хочу жить",
+    r"умереть", r"умр", r"убить себя", r"убью", r"вскрыть вены", r"порезать",
+    r"самоповрежден", r"передозировк", r"спрыгну", r"повеситься",
+    r"нет смысла жить", r"исчезнуть навсегда", r"проща", r"сдаюсь",
+    # Kazakh
+    r"суицид", r"өлгім келеді", r"өмір сүргім келмейді", r"өзіме қол",
+    r"өлтіремін", r"өлейін",
+    # English
+    r"suicide", r"kill myself", r"end my life", r"self[- ]harm",
+    r"hurt myself", r"want to die", r"overdose", r"cut myself",
+]
+_CRISIS_PATTERN = re.compile(
+    "|".join(_CRISIS_KEYWORDS), re.IGNORECASE | re.UNICODE
+)
+
+# Keys the detector JSON must contain — frozenset so validation is a
+# C-level subset check instead of a per-call list + Python loop
+_REQUIRED_KEYS = frozenset({'risk', 'category', 'reasons', 'need_crisis_mode'})
+
+# Closed allowlist of acknowledgements that skip the LLM call. Anything
+# with words that is not literally one of these escalates — short messages
+# are exactly where crisis signals hide ("умру", "прощай"), so there is no
+# length- or letter-count-based shortcut.
+_BENIGN_ACKS = frozenset({
+    # Russian
+    "спасибо", "спасибо большое", "большое спасибо", "благодарю", "спс",
+    "ок", "окей", "ага", "угу", "да", "нет", "хорошо", "ладно",
+    "понял", "поняла", "понятно", "привет", "здравствуйте",
+    "добрый день", "доброе утро", "добрый вечер",
+    # Kazakh
+    "рахмет", "рақмет", "жарайды", "иә", "жоқ", "сәлем", "салем",
+    "сәлеметсіз бе",
+    # English
+    "ok", "okay", "thanks", "thank you", "thanks a lot", "thx",
+    "yes", "no", "yep", "nope", "got it", "i see",
+    "hi", "hello", "hey", "good morning", "good evening",
+})
+
+# Exact-repeat memoization: verdicts for the last N user messages are kept
+# per session, across this many sessions
+_RECENT_PER_SESSION = 8
+_RECENT_SESSIONS_MAX = 1024
+
+# Only the tail of very long messages is sent to the LLM classifier — risk
+# indicators cluster in the latest sentences, and this bounds prompt cost
+# regardless of how much text the user pastes.
+MAX_DETECTOR_CHARS = 1200
+
 
 class RiskDetector:
-    """Detects crisis situations in user messages."""
-    
+    """Detects crisis situations in user messages.
+
+    Two-stage: a local fast path classifies trivially benign short messages
+    without a network call; everything else goes to the LLM classifier.
+    Exact repeats of a recent message in the same session reuse the
+    previous verdict — benign verdicts only, so repeated risk signals are
+    always re-classified and re-logged.
+    """
+
+    def __init__(self):
+        # session_id -> OrderedDict of recent user messages and their
+        # (need_crisis_mode, result) verdicts; both levels are LRU-bounded
+        self._recent: "OrderedDict[UUID, OrderedDict]" = OrderedDict()
+
+    @staticmethod
+    def _fast_classify(text: str) -> Optional[str]:
+        """
+        Local fast-path classification.
+
+        Returns:
+            'none' if the message is trivially benign (skip the LLM),
+            None if ambiguous or a crisis keyword fired (escalate to the LLM)
+        """
+        if _CRISIS_PATTERN.search(text):
+            return None
+
+        stripped = text.strip()
+        if len(stripped) < 3:
+            return 'none'
+
+        # Only punctuation, whitespace and symbols/emoji ("...", "👍🙏")
+        if all(
+            c.isspace() or unicodedata.category(c).startswith(('P', 'Z', 'So'))
+            for c in stripped
+        ):
+            return 'none'
+
+        # Known benign acknowledgement ("Спасибо!", "ok") — anything else
+        # with actual words goes to the LLM classifier
+        if stripped.rstrip('.!?…)').lower() in _BENIGN_ACKS:
+            return 'none'
+
+        return None
+
+    def _recall(self, session_id: UUID, text: str) -> Optional[Tuple[bool, Dict]]:
+        """Return the cached verdict for an exact repeat, if any."""
+        session_cache = self._recent.get(session_id)
+        if session_cache is None:
+            return None
+        verdict = session_cache.get(text)
+        if verdict is not None:
+            session_cache.move_to_end(text)
+        return verdict
+
+    def _remember(self, session_id: UUID, text: str, verdict: Tuple[bool, Dict]) -> None:
+        """Record a verdict for exact-repeat reuse within the session."""
+        session_cache = self._recent.get(session_id)
+        if session_cache is None:
+            session_cache = self._recent[session_id] = OrderedDict()
+            if len(self._recent) > _RECENT_SESSIONS_MAX:
+                self._recent.popitem(last=False)
+        else:
+            self._recent.move_to_end(session_id)
+        session_cache[text] = verdict
+        if len(session_cache) > _RECENT_PER_SESSION:
+            session_cache.popitem(last=False)
+
     async def analyze(
         self, 
         user_message: str,
@@ -32,10 +154,21 @@ class RiskDetector:
             Tuple of (need_crisis_mode, detection_result)
         """
         try:
-            # Build messages for detector
+            # Fast path: trivially benign short messages skip the LLM entirely
+            if self._fast_classify(user_message) == 'none':
+                return False, self._get_safe_default()
+
+            # Exact repeat of a recent message in this session — reuse verdict
+            cached = self._recall(session_id, user_message)
+            if cached is not None:
+                return cached
+
+            # Build messages for detector (keyword scan above already saw the
+            # full text; the LLM only needs the tail)
+            snippet = user_message[-MAX_DETECTOR_CHARS:]
             messages = [
                 {"role": "system", "content": prompt_manager.detector_prompt},
-                {"role": "user", "content": user_message}
+                {"role": "user", "content": snippet}
             ]
             
             # Get AI response in JSON mode
@@ -45,21 +178,22 @@ class RiskDetector:
                 session_id=session_id,
                 message_id=message_id,
                 temperature=0.3,  # Lower temperature for more consistent classification
-                json_mode=True
+                json_mode=True,
+                use_cache=True  # Near-duplicate messages (greetings etc.) skip the LLM
             )
             
             # Parse JSON response
-            result = json.loads(response)
+            result = orjson.loads(response)
             
             # Validate response structure
-            required_keys = ['risk', 'category', 'reasons', 'need_crisis_mode']
-            if not all(key in result for key in required_keys):
-                logger.warning(f"Invalid detector response structure: {result}")
+            if not _REQUIRED_KEYS <= result.keys():
+                logger.warning("Invalid detector response structure: %s", result)
                 result = self._get_safe_default()
             
             # Log risk event if not "none"
             if result['risk'] != 'none':
-                await RiskEventRepository.create(
+                enqueue_db_write(
+                    RiskEventRepository.create,
                     user_id=user_id,
                     session_id=session_id,
                     message_id=message_id,
@@ -68,16 +202,21 @@ class RiskDetector:
                     reasons=result['reasons'],
                     raw_detector_output=result
                 )
-                logger.warning(f"Risk detected: {result['risk']} - {result['category']}")
+                logger.warning("Risk detected: %s - %s", result['risk'], result['category'])
             
+            # Only benign verdicts are memoized — a repeated crisis message
+            # must take the full path again so its risk event is logged,
+            # not vanish from the audit trail on a cache hit
+            if result['risk'] == 'none':
+                self._remember(session_id, user_message, (result['need_crisis_mode'], result))
             return result['need_crisis_mode'], result
             
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse detector JSON response: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse detector JSON response: %s", e)
             return False, self._get_safe_default()
         
         except Exception as e:
-            logger.error(f"Risk detection failed: {e}")
+            logger.error("Risk detection failed: %s", e)
             return False, self._get_safe_default()
     
     @staticmethod
@@ -1,36 +1,80 @@
 """Memory management system."""
-import json
+import asyncio
+from collections import OrderedDict
 from typing import Dict, List, Optional
 from uuid import UUID
 
+import orjson
+
 from ai.client import ai_client
 from ai.prompts import prompt_manager
 from db.models import MemoryRepository, MessageRepository
 from utils.logger import logger
 
+# Role prefixes for conversation formatting, bound once at import
+_ROLE_PREFIX = {
+    'user': 'Пользователь: ',
+    'assistant': 'Психолог: ',
+}
+
+# Fact categories stored as arrays, in canonical order
+_ARRAY_KEYS = ('stable_issues', 'values_and_goals', 'common_triggers',
+               'cognitive_patterns', 'preferred_support_style', 'hard_limits')
+
+# Serialized-facts cache bound — LRU like the other per-user caches in
+# this codebase, so the map can't grow with the user population forever
+_FACTS_CACHE_MAX = 10_000
+
 
 class MemoryManager:
     """Manages session summaries and long-term memory facts."""
-    
+
+    def __init__(self):
+        # Serialized facts per user — for a user whose facts haven't changed
+        # this is the same bytes every turn, so serialize once and reuse.
+        # Invalidated whenever facts are rewritten; LRU-bounded.
+        self._facts_json_cache: "OrderedDict[UUID, str]" = OrderedDict()
+
+    async def update_memory(self, user_id: UUID, session_id: UUID) -> None:
+        """Run the periodic summary and fact extraction as one unit.
+
+        The session messages are fetched once and handed to both
+        subroutines, which then run concurrently — instead of two serial
+        LLM calls each preceded by its own identical history scan.
+        """
+        try:
+            messages = await MessageRepository.get_session_messages(session_id, limit=100)
+        except Exception as e:
+            logger.error("Failed to load messages for memory update: %s", e)
+            return
+
+        await asyncio.gather(
+            self.create_session_summary(user_id, session_id, messages=messages),
+            self.extract_and_update_facts(user_id, session_id, messages=messages),
+        )
+
     async def create_session_summary(
         self,
         user_id: UUID,
-        session_id: UUID
+        session_id: UUID,
+        messages: Optional[List] = None
     ) -> Optional[Dict]:
         """
         Create summary of a session.
-        
+
         Args:
             user_id: User UUID
             session_id: Session UUID
-            
+            messages: Pre-fetched session messages (loaded if omitted)
+
         Returns:
             Summary dict or None if failed
         """
         try:
             # Get session messages
-            messages = await MessageRepository.get_session_messages(session_id, limit=100)
-            
+            if messages is None:
+                messages = await MessageRepository.get_session_messages(session_id, limit=100)
+
             if len(messages) < 3:
                 logger.info("Not enough messages for summary")
                 return None
@@ -49,11 +93,12 @@ class MemoryManager:
                 user_id=user_id,
                 session_id=session_id,
                 temperature=0.5,
-                json_mode=True
+                json_mode=True,
+                use_cache=True  # Identical conversations produce identical summaries
             )
-            
+
             # Parse response
-            summary_data = json.loads(response)
+            summary_data = orjson.loads(response)
             
             # Save to database
             await MemoryRepository.create_summary(
@@ -68,32 +113,35 @@ class MemoryManager:
                 next_session_goal=summary_data.get('next_session_goal', '')
             )
             
-            logger.info(f"Session summary created for session {session_id}")
+            logger.info("Session summary created for session %s", session_id)
             return summary_data
             
         except Exception as e:
-            logger.error(f"Failed to create session summary: {e}")
+            logger.error("Failed to create session summary: %s", e)
             return None
     
     async def extract_and_update_facts(
         self,
         user_id: UUID,
-        session_id: UUID
+        session_id: UUID,
+        messages: Optional[List] = None
     ) -> Optional[Dict]:
         """
         Extract long-term facts from session and update user's memory facts.
-        
+
         Args:
             user_id: User UUID
             session_id: Session UUID
-            
+            messages: Pre-fetched session messages (loaded if omitted)
+
         Returns:
             Updated facts dict or None if failed
         """
         try:
             # Get session messages
-            messages = await MessageRepository.get_session_messages(session_id, limit=100)
-            
+            if messages is None:
+                messages = await MessageRepository.get_session_messages(session_id, limit=100)
+
             if len(messages) < 5:
                 logger.info("Not enough messages for fact extraction")
                 return None
@@ -107,7 +155,7 @@ class MemoryManager:
             # Build prompt with existing facts
             prompt_text = "ПРЕДЫДУЩИЕ ФАКТЫ:\n"
             if existing_facts:
-                prompt_text += json.dumps({
+                prompt_text += orjson.dumps({
                     'profile': existing_facts.get('profile', {}),
                     'stable_issues': existing_facts.get('stable_issues', []),
                     'values_and_goals': existing_facts.get('values_and_goals', []),
@@ -115,7 +163,7 @@ class MemoryManager:
                     'cognitive_patterns': existing_facts.get('cognitive_patterns', []),
                     'preferred_support_style': existing_facts.get('preferred_support_style', []),
                     'hard_limits': existing_facts.get('hard_limits', [])
-                }, ensure_ascii=False, indent=2)
+                }, option=orjson.OPT_INDENT_2).decode()
             else:
                 prompt_text += "Нет данных.\n"
             
@@ -137,30 +185,32 @@ class MemoryManager:
             )
             
             # Parse response
-            new_facts = json.loads(response)
+            new_facts = orjson.loads(response)
             
             # Merge with existing facts
             merged_facts = self._merge_facts(existing_facts, new_facts)
             
-            # Save to database
+            # Save to database and invalidate the serialized-facts cache
             await MemoryRepository.upsert_facts(user_id, merged_facts)
-            
-            logger.info(f"Memory facts updated for user {user_id}")
+            self._facts_json_cache.pop(user_id, None)
+
+            logger.info("Memory facts updated for user %s", user_id)
             return merged_facts
             
         except Exception as e:
-            logger.error(f"Failed to extract memory facts: {e}")
+            logger.error("Failed to extract memory facts: %s", e)
             return None
     
-    async def get_memory_context(self, user_id: UUID) -> tuple[Optional[str], Optional[Dict]]:
+    async def get_memory_context(self, user_id: UUID) -> tuple[Optional[str], Optional[str]]:
         """
         Get memory context for conversation.
-        
+
         Args:
             user_id: User UUID
-            
+
         Returns:
-            Tuple of (summary_text, facts_dict)
+            Tuple of (summary_text, facts_json) — facts pre-serialized so the
+            prompt builder never re-dumps an unchanged dict
         """
         # Get recent summaries
         summaries = await MemoryRepository.get_recent_summaries(user_id, limit=2)
@@ -171,37 +221,38 @@ class MemoryManager:
             for s in summaries:
                 summary_parts.append(s['summary'])
             summary_text = "\n\n".join(summary_parts)
-        
-        # Get facts
-        facts = await MemoryRepository.get_facts(user_id)
-        facts_dict = None
-        if facts:
-            facts_dict = {
-                'profile': facts.get('profile', {}),
-                'stable_issues': facts.get('stable_issues', []),
-                'values_and_goals': facts.get('values_and_goals', []),
-                'common_triggers': facts.get('common_triggers', []),
-                'cognitive_patterns': facts.get('cognitive_patterns', []),
-                'preferred_support_style': facts.get('preferred_support_style', []),
-                'hard_limits': facts.get('hard_limits', [])
-            }
-        
-        return summary_text, facts_dict
+
+        # Serve serialized facts from the per-user cache when possible
+        facts_json = self._facts_json_cache.get(user_id)
+        if facts_json is not None:
+            self._facts_json_cache.move_to_end(user_id)
+        else:
+            facts = await MemoryRepository.get_facts(user_id)
+            if facts:
+                facts_dict = {
+                    'profile': facts.get('profile', {}),
+                    'stable_issues': facts.get('stable_issues', []),
+                    'values_and_goals': facts.get('values_and_goals', []),
+                    'common_triggers': facts.get('common_triggers', []),
+                    'cognitive_patterns': facts.get('cognitive_patterns', []),
+                    'preferred_support_style': facts.get('preferred_support_style', []),
+                    'hard_limits': facts.get('hard_limits', [])
+                }
+                facts_json = orjson.dumps(facts_dict, option=orjson.OPT_INDENT_2).decode()
+                self._facts_json_cache[user_id] = facts_json
+                if len(self._facts_json_cache) > _FACTS_CACHE_MAX:
+                    self._facts_json_cache.popitem(last=False)
+
+        return summary_text, facts_json
     
     @staticmethod
     def _format_conversation_for_summary(messages: List[Dict]) -> str:
         """Format messages for summarization."""
-        lines = []
-        for msg in messages:
-            role = msg['role']
-            content = msg['content']
-            
-            if role == 'user':
-                lines.append(f"Пользователь: {content}")
-            elif role == 'assistant':
-                lines.append(f"Психолог: {content}")
-        
-        return "\n".join(lines)
+        return "\n".join(
+            _ROLE_PREFIX[msg['role']] + msg['content']
+            for msg in messages
+            if msg['role'] in _ROLE_PREFIX
+        )
     
     @staticmethod
     def _merge_facts(existing: Optional[Dict], new: Dict) -> Dict:
@@ -214,12 +265,12 @@ class MemoryManager:
         # Merge profile
         merged['profile'] = {**existing.get('profile', {}), **new.get('profile', {})}
         
-        # Merge arrays (deduplicate)
-        for key in ['stable_issues', 'values_and_goals', 'common_triggers', 
-                    'cognitive_patterns', 'preferred_support_style', 'hard_limits']:
-            existing_items = set(existing.get(key, []))
-            new_items = set(new.get(key, []))
-            merged[key] = list(existing_items | new_items)
+        # Merge arrays (order-preserving dedupe — stable order keeps the
+        # serialized facts deterministic, which preserves prompt caching)
+        for key in _ARRAY_KEYS:
+            merged[key] = list(dict.fromkeys(
+                (*existing.get(key, []), *new.get(key, []))
+            ))
         
         return merged
 
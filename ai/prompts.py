@@ -1,24 +1,45 @@
 """Prompt management system."""
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
-import json
+from typing import Dict, List, Optional, Tuple
 
 from config import config
 from utils.logger import logger
 
+# Language names for the reply-language instruction appended to the system
+# prompt. Three variants per base prompt, all assembled inside the LRU layer.
+_LANG_NAMES = {
+    'ru': 'Russian',
+    'kz': 'Kazakh',
+    'en': 'English',
+}
+
 
 class PromptManager:
     """Manages loading and formatting of prompt templates."""
     
     def __init__(self):
-        self.system_prompt = self._load_file(config.SYSTEM_PROMPT_FILE)
-        self.crisis_prompt = self._load_file(config.CRISIS_PROMPT_FILE)
-        self.detector_prompt = self._load_file(config.DETECTOR_PROMPT_FILE)
-        self.memory_summary_prompt = self._load_file(config.MEMORY_SUMMARY_PROMPT_FILE)
-        self.memory_fact_extractor_prompt = self._load_file(config.MEMORY_FACT_EXTRACTOR_FILE)
-        self.memory_insert_template = self._load_file(config.MEMORY_INSERT_PROMPT_FILE)
-        
-        logger.info("Prompts loaded successfully")
+        try:
+            # Prefer the precompiled module emitted by
+            # scripts/compile_prompts.py — no filesystem I/O at startup
+            from ai import _prompts_data as P
+            self.system_prompt = P.SYSTEM_PROMPT
+            self.crisis_prompt = P.CRISIS_PROMPT
+            self.detector_prompt = P.DETECTOR_PROMPT
+            self.memory_summary_prompt = P.MEMORY_SUMMARY_PROMPT
+            self.memory_fact_extractor_prompt = P.MEMORY_FACT_EXTRACTOR_PROMPT
+            self.memory_insert_template = P.MEMORY_INSERT_TEMPLATE
+            logger.info("Prompts loaded from precompiled module")
+        except ImportError:
+            # Config preloaded the contents at startup; _load_file only runs
+            # (and raises) if a file went missing
+            self.system_prompt = config.SYSTEM_PROMPT or self._load_file(config.SYSTEM_PROMPT_FILE)
+            self.crisis_prompt = config.CRISIS_PROMPT or self._load_file(config.CRISIS_PROMPT_FILE)
+            self.detector_prompt = config.DETECTOR_PROMPT or self._load_file(config.DETECTOR_PROMPT_FILE)
+            self.memory_summary_prompt = config.MEMORY_SUMMARY_PROMPT or self._load_file(config.MEMORY_SUMMARY_PROMPT_FILE)
+            self.memory_fact_extractor_prompt = config.MEMORY_FACT_EXTRACTOR_PROMPT or self._load_file(config.MEMORY_FACT_EXTRACTOR_FILE)
+            self.memory_insert_template = config.MEMORY_INSERT_PROMPT or self._load_file(config.MEMORY_INSERT_PROMPT_FILE)
+            logger.info("Prompts loaded successfully")
     
     @staticmethod
     def _load_file(file_path: Path) -> str:
@@ -26,87 +47,128 @@ class PromptManager:
         try:
             return file_path.read_text(encoding='utf-8')
         except Exception as e:
-            logger.error(f"Failed to load prompt file {file_path}: {e}")
+            logger.error("Failed to load prompt file %s: %s", file_path, e)
             raise
     
     def build_system_prompt(
-        self, 
+        self,
         crisis_mode: bool = False,
         user_settings: Optional[Dict] = None,
         memory_summary: Optional[str] = None,
-        memory_facts: Optional[Dict] = None
-    ) -> str:
+        memory_facts_json: Optional[str] = None,
+        lang: str = 'ru'
+    ) -> Tuple[str, Optional[str]]:
         """
         Build system prompt with optional memory context.
-        
+
+        The static base prompt is returned unmodified so OpenAI's automatic
+        prompt caching can reuse the long stable prefix across turns; all
+        per-user content (preferences, memory) goes into a separate dynamic
+        context message.
+
         Args:
             crisis_mode: Use crisis prompt instead of normal prompt
             user_settings: User preferences (style, response length)
             memory_summary: Recent session summaries
-            memory_facts: Long-term user facts
-            
+            memory_facts_json: Long-term user facts, pre-serialized by the
+                memory manager (serialized once per user, not per turn)
+            lang: Reply language code; the matching instruction is baked
+                into the cached prompt instead of concatenated per turn
+
         Returns:
-            Complete system prompt
+            Tuple of (static_system_prompt, dynamic_context or None)
         """
-        # Choose base prompt
+        # Normalize arguments into hashable keys and delegate to the LRU
+        # layer — the output is deterministic given these inputs, so repeat
+        # turns for the same user state are a dict lookup
+        settings_key = tuple(sorted(user_settings.items())) if user_settings else None
+        return self._build_cached(crisis_mode, settings_key, memory_summary, memory_facts_json, lang)
+
+    @lru_cache(maxsize=1024)
+    def _build_cached(
+        self,
+        crisis_mode: bool,
+        settings_key: Optional[Tuple],
+        memory_summary: Optional[str],
+        facts_json: Optional[str],
+        lang: str
+    ) -> Tuple[str, Optional[str]]:
+        """Cached prompt assembly; see build_system_prompt for semantics."""
+        user_settings = dict(settings_key) if settings_key else None
+
+        # Choose base prompt — kept byte-identical across turns for each of
+        # the few (crisis, lang) combinations, so provider-side prompt
+        # caching still sees a long stable prefix
         base_prompt = self.crisis_prompt if crisis_mode else self.system_prompt
-        
+        lang_name = _LANG_NAMES.get(lang, 'Russian')
+        base_prompt = (
+            f"{base_prompt}\n\nIMPORTANT: Always reply in {lang_name}, "
+            f"regardless of the language the user writes in."
+        )
+
+        dynamic_parts = []
+
         # Add user preferences if provided
         if user_settings and not crisis_mode:
             style = user_settings.get('preferred_style', 'cbt')
             length = user_settings.get('response_length', 'medium')
-            
-            preferences = f"\n\nПредпочтения пользователя:\n"
+
+            preferences = f"Предпочтения пользователя:\n"
             preferences += f"- Стиль: {style}\n"
             preferences += f"- Длина ответа: {length}\n"
-            
-            base_prompt += preferences
-        
+
+            dynamic_parts.append(preferences)
+
         # Inject memory context if allowed and provided
         if not crisis_mode and user_settings and user_settings.get('allow_memory', True):
-            memory_context = self._build_memory_context(memory_summary, memory_facts)
+            memory_context = self._build_memory_context(memory_summary, facts_json)
             if memory_context:
-                base_prompt += "\n\n" + memory_context
-        
-        return base_prompt
+                dynamic_parts.append(memory_context)
+
+        dynamic_context = "\n\n".join(dynamic_parts) if dynamic_parts else None
+        return base_prompt, dynamic_context
     
     def _build_memory_context(
-        self, 
-        summary: Optional[str], 
-        facts: Optional[Dict]
+        self,
+        summary: Optional[str],
+        facts_json: Optional[str]
     ) -> str:
-        """Build memory context section."""
-        if not summary and not facts:
+        """Build memory context section from pre-serialized facts JSON."""
+        if not summary and not facts_json:
             return ""
-        
+
         context = self.memory_insert_template
-        
+
         # Replace summary placeholder
         summary_text = summary if summary else "Нет предыдущих сессий."
         context = context.replace("{{summary}}", summary_text)
-        
+
         # Replace facts placeholder
-        facts_text = json.dumps(facts, ensure_ascii=False, indent=2) if facts else "{}"
-        context = context.replace("{{facts_json}}", facts_text)
-        
+        context = context.replace("{{facts_json}}", facts_json if facts_json else "{}")
+
         return context
     
     def format_messages_for_openai(
-        self, 
-        system_prompt: str, 
-        conversation_history: List[Dict[str, str]]
+        self,
+        system_prompt: str,
+        conversation_history: List[Dict[str, str]],
+        dynamic_context: Optional[str] = None
     ) -> List[Dict[str, str]]:
         """
         Format messages for OpenAI API.
-        
+
         Args:
-            system_prompt: System prompt
+            system_prompt: Static system prompt (stable across turns)
             conversation_history: List of {"role": "user"|"assistant", "content": "..."}
-            
+            dynamic_context: Per-user context (preferences, memory) emitted as
+                a separate message so the system prefix stays cacheable
+
         Returns:
             Formatted messages list
         """
         messages = [{"role": "system", "content": system_prompt}]
+        if dynamic_context:
+            messages.append({"role": "user", "content": dynamic_context})
         messages.extend(conversation_history)
         return messages
 
@@ -1,5 +1,8 @@
 """Main Telegram bot application."""
 import asyncio
+import sys
+from collections import OrderedDict
+
 from telegram import Update
 from telegram.ext import (
     Application,
@@ -9,6 +12,7 @@ from telegram.ext import (
     filters
 )
 
+from ai.client import ai_client
 from config import config
 from db.database import db
 from handlers.commands import (
@@ -17,19 +21,77 @@ from handlers.commands import (
     newsession_command,
     settings_command,
     stats_command,
-    ALL_BTN_NEW_SESSION,
-    ALL_BTN_SETTINGS,
-    ALL_BTN_STATS,
-    ALL_BTN_HELP,
+    BTN_LABEL_TO_ACTION,
 )
 from handlers.conversation import handle_message, handle_error
 from handlers.language import language_command, handle_language_callback
+from utils.background import start_db_write_worker, stop_db_write_worker
 from utils.logger import logger
 
+# Data-driven dispatch: button label (any language) -> handler. One dict
+# lookup per inbound text update instead of a chain of filters.Text checks.
+_ACTION_HANDLERS = {
+    'new_session': newsession_command,
+    'settings': settings_command,
+    'stats': stats_command,
+    'help': help_command,
+}
+BUTTON_ROUTES = {
+    label: _ACTION_HANDLERS[action]
+    for label, action in BTN_LABEL_TO_ACTION.items()
+}
+
+
+# With concurrent_updates enabled, PTB no longer serializes handlers, so a
+# slow OpenAI call for one chat can't stall another chat's /help. Per-chat
+# locks restore ordering where it matters: one update at a time per chat —
+# commands and callbacks included, so /newsession can't archive a session
+# out from under an in-flight handle_message. LRU-bounded like the other
+# caches in this codebase, but a lock that is held (or has queued waiters)
+# is never evicted — dropping it would hand the chat's next update a fresh
+# lock running concurrently with the in-flight handler, the exact race the
+# map exists to prevent.
+_CHAT_LOCKS_MAX = 10_000
+_chat_locks: "OrderedDict[int, asyncio.Lock]" = OrderedDict()
+
+
+def _chat_lock(chat_id: int) -> asyncio.Lock:
+    """Return the serialization lock for a chat, creating it on first use."""
+    lock = _chat_locks.get(chat_id)
+    if lock is None:
+        lock = _chat_locks[chat_id] = asyncio.Lock()
+        if len(_chat_locks) > _CHAT_LOCKS_MAX:
+            # Evict the least recently used *idle* lock. LRU order tracks
+            # acquisition attempts, not releases, so the oldest entry may
+            # well still be held across a slow OpenAI call.
+            for evict_id, candidate in _chat_locks.items():
+                if not candidate.locked() and not candidate._waiters:
+                    del _chat_locks[evict_id]
+                    break
+    else:
+        _chat_locks.move_to_end(chat_id)
+    return lock
+
+
+def _serialized(handler):
+    """Wrap a handler so updates for the same chat run one at a time."""
+    async def wrapped(update: Update, context):
+        async with _chat_lock(update.effective_chat.id):
+            return await handler(update, context)
+    return wrapped
+
+
+async def dispatch_text(update: Update, context):
+    """Route reply-keyboard button presses, fall through to conversation."""
+    handler = BUTTON_ROUTES.get(update.message.text, handle_message)
+    async with _chat_lock(update.effective_chat.id):
+        return await handler(update, context)
+
 
 async def post_init(application: Application):
     """Run after bot initialization."""
     await db.connect()
+    start_db_write_worker()
     # Remove the slash-command menu from the Telegram UI
     await application.bot.delete_my_commands()
     logger.info("Bot initialized successfully")
@@ -37,6 +99,8 @@ async def post_init(application: Application):
 
 async def post_shutdown(application: Application):
     """Run after bot shutdown."""
+    await stop_db_write_worker()
+    await ai_client.aclose()
     await db.disconnect()
     logger.info("Bot shut down successfully")
 
@@ -45,7 +109,7 @@ def main():
     """Main entry point for the bot."""
     missing_config = config.validate()
     if missing_config:
-        logger.error(f"Missing required configuration: {', '.join(missing_config)}")
+        logger.error("Missing required configuration: %s", ', '.join(missing_config))
         print("\n❌ Configuration Error!")
         print("Missing required environment variables:")
         for item in missing_config:
@@ -53,38 +117,45 @@ def main():
         print("\nPlease create a .env file based on .env.example and fill in the required values.")
         return
 
+    # Use uvloop where available (POSIX only) — the bot is entirely I/O bound,
+    # and the libuv-backed loop has much lower per-call scheduling overhead
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            logger.info("Using uvloop event loop")
+        except ImportError:
+            logger.info("uvloop not installed, using default asyncio loop")
+
     logger.info("Starting AI Psychologist Telegram Bot...")
-    logger.info(f"Using model: {config.OPENAI_MODEL}")
+    logger.info("Using model: %s", config.OPENAI_MODEL)
 
     application = (
         Application.builder()
         .token(config.TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(True)
         .post_init(post_init)
         .post_shutdown(post_shutdown)
         .build()
     )
 
-    # Slash command handlers
-    application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("newsession", newsession_command))
-    application.add_handler(CommandHandler("settings", settings_command))
-    application.add_handler(CommandHandler("stats", stats_command))
-    application.add_handler(CommandHandler("language", language_command))
+    # Slash command handlers — serialized per chat like text updates
+    application.add_handler(CommandHandler("start", _serialized(start_command)))
+    application.add_handler(CommandHandler("help", _serialized(help_command)))
+    application.add_handler(CommandHandler("newsession", _serialized(newsession_command)))
+    application.add_handler(CommandHandler("settings", _serialized(settings_command)))
+    application.add_handler(CommandHandler("stats", _serialized(stats_command)))
+    application.add_handler(CommandHandler("language", _serialized(language_command)))
 
     # Inline keyboard callbacks (language selection)
-    application.add_handler(CallbackQueryHandler(handle_language_callback, pattern=r'^lang:'))
-
-    # Reply keyboard button handlers for ALL three language variants of each button
-    # Must be registered BEFORE the generic message handler
-    application.add_handler(MessageHandler(filters.Text(ALL_BTN_NEW_SESSION), newsession_command))
-    application.add_handler(MessageHandler(filters.Text(ALL_BTN_SETTINGS),    settings_command))
-    application.add_handler(MessageHandler(filters.Text(ALL_BTN_STATS),       stats_command))
-    application.add_handler(MessageHandler(filters.Text(ALL_BTN_HELP),        help_command))
+    application.add_handler(
+        CallbackQueryHandler(_serialized(handle_language_callback), pattern=r'^lang:')
+    )
 
-    # Generic message handler for normal conversation
+    # Single text handler: button labels (all language variants) resolve via
+    # BUTTON_ROUTES, everything else goes to the conversation handler
     application.add_handler(
-        MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
+        MessageHandler(filters.TEXT & ~filters.COMMAND, dispatch_text)
     )
 
     application.add_error_handler(handle_error)
@@ -5,7 +5,7 @@ from pathlib import Path
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import config
+from config import config, _prompt_exists
 
 
 def main():
@@ -45,7 +45,7 @@ def main():
                  'MEMORY_SUMMARY_PROMPT_FILE', 'MEMORY_FACT_EXTRACTOR_FILE', 
                  'MEMORY_INSERT_PROMPT_FILE']:
         file_path = getattr(config, attr)
-        exists = file_path.exists()
+        exists = _prompt_exists(file_path)
         status = "✅" if exists else "❌"
         print(f"  {status} {file_path.name}")
         if not exists:
@@ -1,6 +1,9 @@
 """Configuration management for AI Psychologist Bot."""
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -10,72 +13,163 @@ load_dotenv()
 BASE_DIR = Path(__file__).parent
 
 
+@lru_cache(maxsize=None)
+def _prompt_exists(file_path: Path) -> bool:
+    """stat() each prompt file at most once per process.
+
+    The prompt files never change while the bot runs, so validate() and
+    check_setup share one cached answer per path instead of re-stat()ing.
+    """
+    return file_path.exists()
+
+
+def _read_prompt(file_path: Path) -> Optional[str]:
+    """Read a prompt file once at startup; None when missing.
+
+    Missing files are reported by validate() — raising here would break
+    check_setup, whose job is to print what is wrong.
+    """
+    try:
+        return file_path.read_text(encoding='utf-8')
+    except OSError:
+        return None
+
+
+@dataclass(frozen=True, slots=True)
 class Config:
-    """Application configuration."""
-    
+    """Application configuration.
+
+    An immutable snapshot of the environment taken once by from_env();
+    attribute access is a slot read — no os.environ lookups, no dict walks,
+    and no accidental mutation at runtime.
+    """
+
     # Telegram Bot
-    TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
-    
+    TELEGRAM_BOT_TOKEN: str
+
     # OpenAI
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-    OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "1500"))
-    OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
-    
+    OPENAI_API_KEY: str
+    OPENAI_MODEL: str
+    OPENAI_MAX_TOKENS: int
+    OPENAI_TEMPERATURE: float
+
     # Database - supports both individual vars and Railway's DATABASE_URL
-    DATABASE_URL_ENV = os.getenv("DATABASE_URL", "")  # Railway provides this
-    DB_HOST = os.getenv("DB_HOST", "localhost")
-    DB_PORT = int(os.getenv("DB_PORT", "5432"))
-    DB_NAME = os.getenv("DB_NAME", "ai_psycholog")
-    DB_USER = os.getenv("DB_USER", "postgres")
-    DB_PASSWORD = os.getenv("DB_PASSWORD", "")
-    
-    @property
-    def DATABASE_URL(self) -> str:
-        """Build PostgreSQL connection URL."""
-        # Use Railway's DATABASE_URL if available, otherwise build from components
-        if self.DATABASE_URL_ENV:
-            return self.DATABASE_URL_ENV
-        return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
-    
+    DATABASE_URL_ENV: str
+    DB_HOST: str
+    DB_PORT: int
+    DB_NAME: str
+    DB_USER: str
+    DB_PASSWORD: str
+    DATABASE_URL: str
+
     # Application Settings
-    DAILY_MESSAGE_LIMIT = int(os.getenv("DAILY_MESSAGE_LIMIT", "20"))
-    SESSION_TIMEOUT_HOURS = int(os.getenv("SESSION_TIMEOUT_HOURS", "24"))
-    MEMORY_SUMMARY_EVERY_N_MESSAGES = int(os.getenv("MEMORY_SUMMARY_EVERY_N_MESSAGES", "10"))
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-    
-    # Prompt files
-    SYSTEM_PROMPT_FILE = BASE_DIR / "system_promt.md"
-    CRISIS_PROMPT_FILE = BASE_DIR / "crisis_prompt.md"
-    DETECTOR_PROMPT_FILE = BASE_DIR / "detector_prompt.md"
-    MEMORY_SUMMARY_PROMPT_FILE = BASE_DIR / "memort_summary_prompt.md"
-    MEMORY_FACT_EXTRACTOR_FILE = BASE_DIR / "memory_fact_extractor.md"
-    MEMORY_INSERT_PROMPT_FILE = BASE_DIR / "memory_insert_prompt.md"
-    
+    DAILY_MESSAGE_LIMIT: int
+    SESSION_TIMEOUT_HOURS: int
+    MEMORY_SUMMARY_EVERY_N_MESSAGES: int
+    LOG_LEVEL: str
+    FORCE_CONSOLE_LOG: bool
+    # 'inprocess' rotates the log file from the handler; 'external' defers
+    # to logrotate(8) (see deploy/logrotate.d/ai_psycholog)
+    LOG_ROTATION_MODE: str
+    # LOG_TO_FILE=0 for container deploys that collect stdout instead
+    LOG_TO_FILE: bool
+
+    # Prompt files (paths kept for diagnostics)
+    SYSTEM_PROMPT_FILE: Path
+    CRISIS_PROMPT_FILE: Path
+    DETECTOR_PROMPT_FILE: Path
+    MEMORY_SUMMARY_PROMPT_FILE: Path
+    MEMORY_FACT_EXTRACTOR_FILE: Path
+    MEMORY_INSERT_PROMPT_FILE: Path
+
+    # Prompt contents, preloaded once at startup (None when the file is
+    # missing — validate() reports that)
+    SYSTEM_PROMPT: Optional[str]
+    CRISIS_PROMPT: Optional[str]
+    DETECTOR_PROMPT: Optional[str]
+    MEMORY_SUMMARY_PROMPT: Optional[str]
+    MEMORY_FACT_EXTRACTOR_PROMPT: Optional[str]
+    MEMORY_INSERT_PROMPT: Optional[str]
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        """Read every environment variable exactly once and freeze the result."""
+        database_url_env = os.getenv("DATABASE_URL", "")  # Railway provides this
+        db_host = os.getenv("DB_HOST", "localhost")
+        db_port = int(os.getenv("DB_PORT", "5432"))
+        db_name = os.getenv("DB_NAME", "ai_psycholog")
+        db_user = os.getenv("DB_USER", "postgres")
+        db_password = os.getenv("DB_PASSWORD", "")
+
+        system_prompt_file = BASE_DIR / "system_promt.md"
+        crisis_prompt_file = BASE_DIR / "crisis_prompt.md"
+        detector_prompt_file = BASE_DIR / "detector_prompt.md"
+        memory_summary_prompt_file = BASE_DIR / "memort_summary_prompt.md"
+        memory_fact_extractor_file = BASE_DIR / "memory_fact_extractor.md"
+        memory_insert_prompt_file = BASE_DIR / "memory_insert_prompt.md"
+
+        return cls(
+            TELEGRAM_BOT_TOKEN=os.getenv("TELEGRAM_BOT_TOKEN", ""),
+            OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", ""),
+            OPENAI_MODEL=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            OPENAI_MAX_TOKENS=int(os.getenv("OPENAI_MAX_TOKENS", "1500")),
+            OPENAI_TEMPERATURE=float(os.getenv("OPENAI_TEMPERATURE", "0.7")),
+            DATABASE_URL_ENV=database_url_env,
+            DB_HOST=db_host,
+            DB_PORT=db_port,
+            DB_NAME=db_name,
+            DB_USER=db_user,
+            DB_PASSWORD=db_password,
+            # Use Railway's DATABASE_URL if available, otherwise build from components
+            DATABASE_URL=database_url_env or (
+                f"postgresql://{db_user}:{db_password}"
+                f"@{db_host}:{db_port}/{db_name}"
+            ),
+            DAILY_MESSAGE_LIMIT=int(os.getenv("DAILY_MESSAGE_LIMIT", "20")),
+            SESSION_TIMEOUT_HOURS=int(os.getenv("SESSION_TIMEOUT_HOURS", "24")),
+            MEMORY_SUMMARY_EVERY_N_MESSAGES=int(os.getenv("MEMORY_SUMMARY_EVERY_N_MESSAGES", "10")),
+            LOG_LEVEL=os.getenv("LOG_LEVEL", "INFO"),
+            FORCE_CONSOLE_LOG=os.getenv("FORCE_CONSOLE_LOG", "").lower() in ("1", "true", "yes"),
+            LOG_ROTATION_MODE=os.getenv("LOG_ROTATION_MODE", "inprocess"),
+            LOG_TO_FILE=os.getenv("LOG_TO_FILE", "1") != "0",
+            SYSTEM_PROMPT_FILE=system_prompt_file,
+            CRISIS_PROMPT_FILE=crisis_prompt_file,
+            DETECTOR_PROMPT_FILE=detector_prompt_file,
+            MEMORY_SUMMARY_PROMPT_FILE=memory_summary_prompt_file,
+            MEMORY_FACT_EXTRACTOR_FILE=memory_fact_extractor_file,
+            MEMORY_INSERT_PROMPT_FILE=memory_insert_prompt_file,
+            SYSTEM_PROMPT=_read_prompt(system_prompt_file),
+            CRISIS_PROMPT=_read_prompt(crisis_prompt_file),
+            DETECTOR_PROMPT=_read_prompt(detector_prompt_file),
+            MEMORY_SUMMARY_PROMPT=_read_prompt(memory_summary_prompt_file),
+            MEMORY_FACT_EXTRACTOR_PROMPT=_read_prompt(memory_fact_extractor_file),
+            MEMORY_INSERT_PROMPT=_read_prompt(memory_insert_prompt_file),
+        )
+
     def validate(self) -> list[str]:
         """Validate configuration and return list of missing required fields."""
         missing = []
-        
+
         if not self.TELEGRAM_BOT_TOKEN:
             missing.append("TELEGRAM_BOT_TOKEN")
-        
+
         if not self.OPENAI_API_KEY:
             missing.append("OPENAI_API_KEY")
-        
+
         # Database: require either DATABASE_URL (Railway) or DB_PASSWORD (local)
         if not self.DATABASE_URL_ENV and not self.DB_PASSWORD:
             missing.append("DB_PASSWORD or DATABASE_URL")
-        
+
         # Check prompt files exist
         for attr_name in ["SYSTEM_PROMPT_FILE", "CRISIS_PROMPT_FILE", "DETECTOR_PROMPT_FILE",
-                          "MEMORY_SUMMARY_PROMPT_FILE", "MEMORY_FACT_EXTRACTOR_FILE", 
+                          "MEMORY_SUMMARY_PROMPT_FILE", "MEMORY_FACT_EXTRACTOR_FILE",
                           "MEMORY_INSERT_PROMPT_FILE"]:
             file_path = getattr(self, attr_name)
-            if not file_path.exists():
+            if not _prompt_exists(file_path):
                 missing.append(f"{attr_name} (file not found: {file_path})")
-        
+
         return missing
 
 
 # Global config instance
-config = Config()
+config = Config.from_env()
@@ -1,18 +1,57 @@
 """Database connection and session management."""
 import asyncpg
+import orjson
 from typing import Optional
-from contextlib import asynccontextmanager
 
 from config import config
 from utils.logger import logger
 
 
+def _encode_jsonb(value) -> bytes:
+    # Binary jsonb wire format: version byte 0x01 followed by UTF-8 JSON
+    return b'\x01' + orjson.dumps(value)
+
+
+def _decode_jsonb(data: bytes):
+    return orjson.loads(data[1:])
+
+
 class Database:
     """PostgreSQL database connection manager."""
     
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
-    
+
+    @staticmethod
+    async def _init_connection(conn: asyncpg.Connection):
+        """Per-connection setup: jsonb codec plus statement-cache warming.
+
+        The jsonb codec routes (de)serialization through orjson in binary
+        format, so repositories pass Python dicts straight to the driver —
+        no json.dumps on the hot path, and jsonb columns come back as dicts.
+
+        asyncpg keys its prepared-statement LRU by query string; priming it
+        here means the first user message served by each pool connection
+        skips the Parse/Describe round-trip for every hot query.
+        """
+        await conn.set_type_codec(
+            'jsonb',
+            encoder=_encode_jsonb,
+            decoder=_decode_jsonb,
+            schema='pg_catalog',
+            format='binary',
+        )
+
+        from db.models import HOT_QUERIES  # local import — models imports this module
+
+        for query in HOT_QUERIES:
+            try:
+                # _prepare(use_cache=True) populates the same cache that
+                # fetch/fetchrow consult; the public prepare() does not
+                await conn._prepare(query, use_cache=True)
+            except AttributeError:  # private API moved — warming is best-effort
+                break
+
     async def connect(self):
         """Create database connection pool."""
         try:
@@ -22,9 +61,15 @@ class Database:
                     dsn=config.DATABASE_URL,
                     min_size=5,
                     max_size=20,
-                    command_timeout=60
+                    command_timeout=60,
+                    statement_cache_size=2048,
+                    max_inactive_connection_lifetime=300,
+                    # JIT only hurts sub-ms OLTP statements; the app name
+                    # makes the bot identifiable in pg_stat_activity
+                    server_settings={'jit': 'off', 'application_name': 'ai_psy_bot'},
+                    init=self._init_connection
                 )
-                logger.info(f"Database pool created using DATABASE_URL")
+                logger.info("Database pool created using DATABASE_URL")
             else:
                 self.pool = await asyncpg.create_pool(
                     host=config.DB_HOST,
@@ -34,11 +79,21 @@ class Database:
                     password=config.DB_PASSWORD,
                     min_size=5,
                     max_size=20,
-                    command_timeout=60
+                    command_timeout=60,
+                    statement_cache_size=2048,
+                    max_inactive_connection_lifetime=300,
+                    # JIT only hurts sub-ms OLTP statements; the app name
+                    # makes the bot identifiable in pg_stat_activity
+                    server_settings={'jit': 'off', 'application_name': 'ai_psy_bot'},
+                    init=self._init_connection
                 )
-                logger.info(f"Database pool created: {config.DB_NAME}@{config.DB_HOST}")
+                logger.info("Database pool created: %s@%s", config.DB_NAME, config.DB_HOST)
+
+            # Bypass the not-connected guard from here on: callers get the
+            # pool's own acquire context manager with no wrapper in between
+            self.acquire = self.pool.acquire
         except Exception as e:
-            logger.error(f"Failed to connect to database: {e}")
+            logger.error("Failed to connect to database: %s", e)
             raise
     
     async def disconnect(self):
@@ -47,20 +102,26 @@ class Database:
             await self.pool.close()
             logger.info("Database pool closed")
     
-    @asynccontextmanager
-    async def acquire(self):
-        """Acquire a connection from the pool."""
-        if not self.pool:
-            raise RuntimeError("Database pool not initialized. Call connect() first.")
-        
-        async with self.pool.acquire() as connection:
-            yield connection
-    
+    def acquire(self):
+        """Acquire a connection from the pool.
+
+        Rebound to `self.pool.acquire` once the pool exists (see connect),
+        removing a generator frame from every query; this fallback only
+        fires if connect() was never called.
+        """
+        raise RuntimeError("Database pool not initialized. Call connect() first.")
+
+
     async def execute(self, query: str, *args):
         """Execute a query that doesn't return results."""
         async with self.acquire() as conn:
             return await conn.execute(query, *args)
     
+    async def executemany(self, query: str, args):
+        """Execute a query for each argument tuple in one round-trip."""
+        async with self.acquire() as conn:
+            return await conn.executemany(query, args)
+
     async def fetch(self, query: str, *args):
         """Fetch multiple rows."""
         async with self.acquire() as conn:
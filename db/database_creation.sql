@@ -34,13 +34,22 @@ CREATE TABLE sessions (
     -- active | archived
     started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
     ended_at TIMESTAMPTZ,
-    last_message_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    last_message_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    -- running counter maintained by the message-insert CTE; avoids a
+    -- COUNT(*) scan per message (see db/migrations/001)
+    message_count INT NOT NULL DEFAULT 0
 );
 
 CREATE INDEX idx_sessions_user_id ON sessions (user_id);
 
 CREATE INDEX idx_sessions_last_message_at ON sessions (last_message_at);
 
+-- Partial index matching SessionRepository.get_active
+-- (user_id + status='active', newest first); see db/migrations/002
+CREATE INDEX idx_sessions_active ON sessions (user_id, started_at DESC)
+WHERE
+    status = 'active';
+
 CREATE TABLE messages (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid (),
     session_id UUID NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
@@ -76,6 +85,12 @@ CREATE INDEX idx_risk_events_risk ON risk_events (risk);
 
 CREATE INDEX idx_risk_events_category ON risk_events (category);
 
+-- Partial index matching RiskEventRepository.get_recent_high_risk;
+-- see db/migrations/002
+CREATE INDEX idx_risk_events_recent_high ON risk_events (user_id, created_at DESC)
+WHERE
+    risk IN ('medium', 'high');
+
 CREATE TABLE memory_summaries (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid (),
     user_id UUID NOT NULL REFERENCES users (id) ON DELETE CASCADE,
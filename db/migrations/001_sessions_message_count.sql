@@ -0,0 +1,15 @@
+-- Running message counter on sessions: maintained by the message-insert
+-- CTE in db/models.py, replacing the per-message COUNT(*) scan that
+-- decided when to summarize memory. Backfills existing sessions.
+
+ALTER TABLE sessions
+    ADD COLUMN IF NOT EXISTS message_count INT NOT NULL DEFAULT 0;
+
+UPDATE sessions s
+SET message_count = m.cnt
+FROM (
+    SELECT session_id, COUNT(*) AS cnt
+    FROM messages
+    GROUP BY session_id
+) m
+WHERE s.id = m.session_id;
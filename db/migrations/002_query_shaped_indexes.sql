@@ -0,0 +1,16 @@
+-- Partial indexes shaped to the repository hot queries:
+--   SessionRepository.get_active: user_id = $1 AND status = 'active'
+--                                 ORDER BY started_at DESC LIMIT 1
+--   RiskEventRepository.get_recent_high_risk: user_id = $1 AND
+--                                 risk IN ('medium','high')
+--                                 ORDER BY created_at DESC LIMIT N
+-- messages (session_id, created_at) is already covered by
+-- idx_messages_session_id_created_at from the base schema.
+
+CREATE INDEX IF NOT EXISTS idx_sessions_active
+    ON sessions (user_id, started_at DESC)
+    WHERE status = 'active';
+
+CREATE INDEX IF NOT EXISTS idx_risk_events_recent_high
+    ON risk_events (user_id, created_at DESC)
+    WHERE risk IN ('medium', 'high');
@@ -1,12 +1,163 @@
 """Database models and repository pattern for all tables."""
-from typing import Optional, Dict, Any, List
-from datetime import datetime, date
-import json
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 from uuid import UUID
 
+import asyncpg
+
 from db.database import db
 from utils.logger import logger
 
+# Explicit column lists — interpolated into the query constants at import
+# time so reads never ship columns the caller discards (SELECT * also
+# breaks prepared-statement reuse across schema changes).
+_USER_COLS = ("id, telegram_user_id, telegram_chat_id, username, first_name, "
+              "last_name, language_code, timezone, is_blocked, created_at, updated_at")
+_SETTINGS_COLS = ("user_id, preferred_style, response_length, allow_memory, "
+                  "allow_sensitive_topics, language, updated_at")
+_SESSION_COLS = "id, user_id, status, started_at, ended_at, last_message_at, message_count"
+_MESSAGE_COLS = "id, session_id, user_id, role, content, meta, created_at"
+# History reads skip the jsonb meta column — neither the prompt builder
+# nor the memory summarizer uses it
+_MESSAGE_HISTORY_COLS = "id, session_id, user_id, role, content, created_at"
+_USAGE_COLS = "user_id, daily_message_limit, daily_message_used, daily_reset_at, updated_at"
+_RISK_COLS = ("id, user_id, session_id, message_id, risk, category, reasons, "
+              "raw_detector_output, created_at")
+_SUMMARY_COLS = ("id, user_id, session_id, summary, main_topics, user_emotions, "
+                 "key_thoughts, triggers, helpful_strategies_used, next_session_goal, created_at")
+_FACTS_COLS = ("user_id, profile, stable_issues, values_and_goals, common_triggers, "
+               "cognitive_patterns, preferred_support_style, hard_limits, updated_at")
+
+# SQL for the statements executed on (nearly) every user message, hoisted so
+# they can be pre-parsed per connection by the pool init callback — see
+# Database._init_connection. asyncpg caches prepared statements by
+# query string, so these must stay byte-identical to the repository calls.
+_SETTINGS_GET_SQL = f"SELECT {_SETTINGS_COLS} FROM user_settings WHERE user_id = $1"
+
+# One fixed statement covers every settings update: unset fields arrive as
+# NULL and COALESCE keeps the stored value. Dynamic SET-clause SQL would
+# generate a distinct query text (and prepared statement) per field combo.
+_SETTINGS_UPDATE_SQL = f"""
+    UPDATE user_settings SET
+        preferred_style = COALESCE($2, preferred_style),
+        response_length = COALESCE($3, response_length),
+        allow_memory = COALESCE($4, allow_memory),
+        allow_sensitive_topics = COALESCE($5, allow_sensitive_topics),
+        language = COALESCE($6, language),
+        updated_at = now()
+    WHERE user_id = $1
+    RETURNING {_SETTINGS_COLS}
+"""
+
+_SESSION_GET_ACTIVE_SQL = f"""
+    SELECT {_SESSION_COLS} FROM sessions
+    WHERE user_id = $1 AND status = 'active'
+    ORDER BY started_at DESC
+    LIMIT 1
+"""
+
+_SESSION_TOUCH_SQL = "UPDATE sessions SET last_message_at = now() WHERE id = $1"
+
+_MESSAGE_INSERT_SQL = f"""
+    INSERT INTO messages (session_id, user_id, role, content, meta)
+    VALUES ($1, $2, $3, $4, $5)
+    RETURNING {_MESSAGE_COLS}
+"""
+
+_MESSAGE_INSERT_TOUCH_SQL = f"""
+    WITH m AS (
+        INSERT INTO messages (session_id, user_id, role, content, meta)
+        VALUES ($1, $2, $3, $4, $5)
+        RETURNING {_MESSAGE_COLS}
+    ), touch AS (
+        UPDATE sessions
+        SET last_message_at = now(), message_count = message_count + 1
+        WHERE id = $1
+        RETURNING message_count
+    )
+    SELECT {_MESSAGE_COLS}, (SELECT message_count FROM touch) AS session_message_count
+    FROM m
+"""
+
+_MESSAGE_LIST_SQL = f"""
+    SELECT {_MESSAGE_HISTORY_COLS} FROM messages
+    WHERE session_id = $1
+    ORDER BY created_at ASC
+    LIMIT $2
+"""
+
+_MESSAGE_COUNT_SQL = "SELECT message_count FROM sessions WHERE id = $1"
+
+_USAGE_INSERT_SQL = f"""
+    INSERT INTO usage_limits (user_id, daily_message_limit)
+    VALUES ($1, $2)
+    ON CONFLICT (user_id) DO UPDATE
+        SET updated_at = usage_limits.updated_at
+    RETURNING {_USAGE_COLS}
+"""
+
+_USAGE_SELECT_SQL = f"SELECT {_USAGE_COLS} FROM usage_limits WHERE user_id = $1"
+
+_USAGE_CONSUME_SQL = """
+    INSERT INTO usage_limits (user_id, daily_message_limit, daily_message_used, daily_reset_at)
+    VALUES ($1, $2, 1, CURRENT_DATE)
+    ON CONFLICT (user_id) DO UPDATE SET
+        daily_message_used = CASE
+            WHEN usage_limits.daily_reset_at < CURRENT_DATE THEN 1
+            ELSE usage_limits.daily_message_used + 1
+        END,
+        daily_reset_at = CURRENT_DATE,
+        updated_at = now()
+    RETURNING daily_message_used, daily_message_limit
+"""
+
+_USAGE_REFUND_SQL = """
+    UPDATE usage_limits
+    SET daily_message_used = GREATEST(daily_message_used - 1, 0),
+        updated_at = now()
+    WHERE user_id = $1 AND daily_reset_at = CURRENT_DATE
+"""
+
+_USAGE_INCREMENT_SQL = f"""
+    UPDATE usage_limits
+    SET
+        daily_message_used = CASE
+            WHEN daily_reset_at < CURRENT_DATE THEN 1
+            ELSE daily_message_used + 1
+        END,
+        daily_reset_at = CURRENT_DATE,
+        updated_at = now()
+    WHERE user_id = $1
+    RETURNING {_USAGE_COLS}
+"""
+
+_LLM_REQUEST_INSERT_SQL = """
+    INSERT INTO llm_requests
+    (user_id, session_id, message_id, provider, model, prompt_tokens,
+     completion_tokens, total_tokens, latency_ms, cost_usd, status,
+     error_code, error_message)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+    RETURNING id
+"""
+
+# Statements pre-parsed on every new pool connection
+HOT_QUERIES = (
+    _SETTINGS_GET_SQL,
+    _SETTINGS_UPDATE_SQL,
+    _SESSION_GET_ACTIVE_SQL,
+    _SESSION_TOUCH_SQL,
+    _MESSAGE_INSERT_SQL,
+    _MESSAGE_INSERT_TOUCH_SQL,
+    _MESSAGE_LIST_SQL,
+    _MESSAGE_COUNT_SQL,
+    _USAGE_INSERT_SQL,
+    _USAGE_SELECT_SQL,
+    _USAGE_CONSUME_SQL,
+    _USAGE_INCREMENT_SQL,
+    _LLM_REQUEST_INSERT_SQL,
+)
+
 
 class UserRepository:
     """Repository for users table."""
@@ -19,9 +170,9 @@ class UserRepository:
         first_name: Optional[str] = None,
         last_name: Optional[str] = None,
         language_code: str = "ru"
-    ) -> Dict[str, Any]:
+    ) -> asyncpg.Record:
         """Create new user or update existing one."""
-        query = """
+        query = f"""
             INSERT INTO users (telegram_user_id, telegram_chat_id, username, first_name, last_name, language_code)
             VALUES ($1, $2, $3, $4, $5, $6)
             ON CONFLICT (telegram_user_id) 
@@ -31,67 +182,195 @@ class UserRepository:
                 first_name = EXCLUDED.first_name,
                 last_name = EXCLUDED.last_name,
                 updated_at = now()
-            RETURNING *
+            RETURNING {_USER_COLS}
         """
         row = await db.fetchrow(query, telegram_user_id, telegram_chat_id, username, 
                                 first_name, last_name, language_code)
-        return dict(row)
+        return row
     
     @staticmethod
-    async def get_by_telegram_id(telegram_user_id: int) -> Optional[Dict[str, Any]]:
+    async def bootstrap_user(
+        telegram_user_id: int,
+        telegram_chat_id: int,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        language_code: str = "ru"
+    ) -> asyncpg.Record:
+        """Register a user and everything /start needs in one statement.
+
+        A single multi-CTE query upserts the user, creates default settings
+        and the usage-limit row if missing, reuses or opens the active
+        session, and reads the stored language — collapsing the 4-5 serial
+        round trips start_command used to make. A lone statement is
+        implicitly atomic, so no explicit transaction is needed.
+
+        Returns:
+            Record with 'user_id', 'session_id' and 'language'
+        """
+        query = """
+            WITH u AS (
+                INSERT INTO users (telegram_user_id, telegram_chat_id, username, first_name, last_name, language_code)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                ON CONFLICT (telegram_user_id)
+                DO UPDATE SET
+                    telegram_chat_id = EXCLUDED.telegram_chat_id,
+                    username = EXCLUDED.username,
+                    first_name = EXCLUDED.first_name,
+                    last_name = EXCLUDED.last_name,
+                    updated_at = now()
+                RETURNING id
+            ), settings_ins AS (
+                INSERT INTO user_settings (user_id)
+                SELECT id FROM u
+                ON CONFLICT (user_id) DO NOTHING
+            ), limits_ins AS (
+                INSERT INTO usage_limits (user_id)
+                SELECT id FROM u
+                ON CONFLICT (user_id) DO NOTHING
+            ), new_session AS (
+                INSERT INTO sessions (user_id, status)
+                SELECT id, 'active' FROM u
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM sessions s
+                    WHERE s.user_id = (SELECT id FROM u) AND s.status = 'active'
+                )
+                RETURNING id
+            )
+            SELECT
+                (SELECT id FROM u) AS user_id,
+                COALESCE(
+                    (SELECT id FROM new_session),
+                    (SELECT s.id FROM sessions s
+                     WHERE s.user_id = (SELECT id FROM u) AND s.status = 'active'
+                     ORDER BY s.started_at DESC LIMIT 1)
+                ) AS session_id,
+                COALESCE(
+                    (SELECT language FROM user_settings WHERE user_id = (SELECT id FROM u)),
+                    'ru'
+                ) AS language
+        """
+        row = await db.fetchrow(query, telegram_user_id, telegram_chat_id,
+                                username, first_name, last_name, language_code)
+        return row
+
+    @staticmethod
+    async def get_by_telegram_id(telegram_user_id: int) -> Optional[asyncpg.Record]:
         """Get user by Telegram user ID."""
-        query = "SELECT * FROM users WHERE telegram_user_id = $1"
+        query = f"SELECT {_USER_COLS} FROM users WHERE telegram_user_id = $1"
         row = await db.fetchrow(query, telegram_user_id)
-        return dict(row) if row else None
+        return row
     
     @staticmethod
-    async def get_by_id(user_id: UUID) -> Optional[Dict[str, Any]]:
+    async def get_by_id(user_id: UUID) -> Optional[asyncpg.Record]:
         """Get user by UUID."""
-        query = "SELECT * FROM users WHERE id = $1"
+        query = f"SELECT {_USER_COLS} FROM users WHERE id = $1"
         row = await db.fetchrow(query, user_id)
-        return dict(row) if row else None
+        return row
+
+
+# In-process language cache: user_id -> (cached_at, lang). The language is
+# read on every message but rarely changes; a short TTL plus explicit
+# invalidation on writes keeps one DB round trip off the hot path.
+# Single-process deploy, so no cross-process invalidation needed.
+_LANG_CACHE_TTL = 60.0  # seconds
+_LANG_CACHE_MAX = 4096
+_lang_cache: "OrderedDict[UUID, Tuple[float, str]]" = OrderedDict()
+
+# Same idea for the full settings row, which handle_message reads on every
+# turn: short TTL, write-through on mutation. Records are immutable, so
+# handing the same object to multiple turns is safe.
+_SETTINGS_CACHE_TTL = 60.0  # seconds
+_SETTINGS_CACHE_MAX = 10_000
+_settings_cache: "OrderedDict[UUID, Tuple[float, asyncpg.Record]]" = OrderedDict()
+
+
+def _settings_cache_put(user_id: UUID, row: asyncpg.Record) -> None:
+    _settings_cache[user_id] = (time.monotonic(), row)
+    if len(_settings_cache) > _SETTINGS_CACHE_MAX:
+        _settings_cache.popitem(last=False)
 
 
 class UserSettingsRepository:
     """Repository for user_settings table."""
-    
+
     @staticmethod
-    async def create_default(user_id: UUID) -> Dict[str, Any]:
-        """Create default settings for user."""
-        query = """
+    async def create_default(user_id: UUID) -> asyncpg.Record:
+        """Create default settings for user.
+
+        On conflict the no-op DO UPDATE makes RETURNING yield the existing
+        row, avoiding the fallback SELECT.
+        """
+        query = f"""
             INSERT INTO user_settings (user_id)
             VALUES ($1)
-            ON CONFLICT (user_id) DO NOTHING
-            RETURNING *
+            ON CONFLICT (user_id) DO UPDATE
+                SET updated_at = user_settings.updated_at
+            RETURNING {_SETTINGS_COLS}
         """
         row = await db.fetchrow(query, user_id)
-        return dict(row) if row else await UserSettingsRepository.get(user_id)
-    
+        if row is not None:
+            _settings_cache_put(user_id, row)
+        return row
+
     @staticmethod
-    async def get(user_id: UUID) -> Optional[Dict[str, Any]]:
-        """Get user settings."""
-        query = "SELECT * FROM user_settings WHERE user_id = $1"
-        row = await db.fetchrow(query, user_id)
-        return dict(row) if row else None
-    
+    async def get(user_id: UUID) -> Optional[asyncpg.Record]:
+        """Get user settings, served from a 60-second in-process cache.
+
+        Mutations write through the cache, so changes made by this process
+        apply immediately; only-missing rows are never cached.
+        """
+        cached = _settings_cache.get(user_id)
+        if cached is not None and time.monotonic() - cached[0] < _SETTINGS_CACHE_TTL:
+            _settings_cache.move_to_end(user_id)
+            return cached[1]
+
+        row = await db.fetchrow(_SETTINGS_GET_SQL, user_id)
+        if row is not None:
+            _settings_cache_put(user_id, row)
+        return row
+
     @staticmethod
-    async def update(user_id: UUID, **kwargs) -> Dict[str, Any]:
-        """Update user settings."""
-        valid_fields = ['preferred_style', 'response_length', 'allow_memory', 'allow_sensitive_topics', 'language']
-        updates = {k: v for k, v in kwargs.items() if k in valid_fields}
-        
-        if not updates:
-            return await UserSettingsRepository.get(user_id)
-        
-        set_clause = ", ".join([f"{k} = ${i+2}" for i, k in enumerate(updates.keys())])
-        query = f"UPDATE user_settings SET {set_clause}, updated_at = now() WHERE user_id = $1 RETURNING *"
-        
-        row = await db.fetchrow(query, user_id, *updates.values())
-        return dict(row)
+    async def update(
+        user_id: UUID,
+        preferred_style: Optional[str] = None,
+        response_length: Optional[str] = None,
+        allow_memory: Optional[bool] = None,
+        allow_sensitive_topics: Optional[bool] = None,
+        language: Optional[str] = None
+    ) -> asyncpg.Record:
+        """Update user settings; fields left as None keep their value."""
+        row = await db.fetchrow(
+            _SETTINGS_UPDATE_SQL, user_id, preferred_style, response_length,
+            allow_memory, allow_sensitive_topics, language
+        )
+        if row is not None:
+            _settings_cache_put(user_id, row)
+        else:
+            _settings_cache.pop(user_id, None)
+        return row
     
     @staticmethod
     async def get_user_language(user_id: UUID) -> str:
-        """Return the user's chosen language code, defaulting to 'ru'."""
+        """Return the user's chosen language code, defaulting to 'ru'.
+
+        Served from a 60-second in-process cache; set_user_language
+        refreshes the entry immediately, so changes still apply at once.
+        """
+        cached = _lang_cache.get(user_id)
+        if cached is not None and time.monotonic() - cached[0] < _LANG_CACHE_TTL:
+            _lang_cache.move_to_end(user_id)
+            return cached[1]
+
+        lang = await UserSettingsRepository._fetch_user_language(user_id)
+        _lang_cache[user_id] = (time.monotonic(), lang)
+        if len(_lang_cache) > _LANG_CACHE_MAX:
+            _lang_cache.popitem(last=False)
+        return lang
+
+    @staticmethod
+    async def _fetch_user_language(user_id: UUID) -> str:
+        """Load the language from the database, defaulting to 'ru'."""
         settings = await UserSettingsRepository.get(user_id)
         if settings:
             return settings.get('language', 'ru') or 'ru'
@@ -101,49 +380,56 @@ class UserSettingsRepository:
     async def set_user_language(user_id: UUID, lang: str) -> None:
         """Persist the user's chosen language code."""
         await UserSettingsRepository.update(user_id, language=lang)
+        _lang_cache[user_id] = (time.monotonic(), lang)
 
 
 class SessionRepository:
     """Repository for sessions table."""
     
     @staticmethod
-    async def create(user_id: UUID) -> Dict[str, Any]:
-        """Create new session."""
-        query = """
+    async def create(
+        user_id: UUID,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> asyncpg.Record:
+        """Create new session.
+
+        Pass `conn` to reuse an already-acquired pool connection when the
+        caller runs several session queries back to back.
+        """
+        query = f"""
             INSERT INTO sessions (user_id, status)
             VALUES ($1, 'active')
-            RETURNING *
+            RETURNING {_SESSION_COLS}
         """
-        row = await db.fetchrow(query, user_id)
-        return dict(row)
-    
+        row = await (conn or db).fetchrow(query, user_id)
+        return row
+
     @staticmethod
-    async def get_active(user_id: UUID) -> Optional[Dict[str, Any]]:
+    async def get_active(
+        user_id: UUID,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Optional[asyncpg.Record]:
         """Get active session for user."""
-        query = """
-            SELECT * FROM sessions 
-            WHERE user_id = $1 AND status = 'active'
-            ORDER BY started_at DESC
-            LIMIT 1
-        """
-        row = await db.fetchrow(query, user_id)
-        return dict(row) if row else None
-    
+        row = await (conn or db).fetchrow(_SESSION_GET_ACTIVE_SQL, user_id)
+        return row
+
     @staticmethod
-    async def archive(session_id: UUID) -> None:
+    async def archive(
+        session_id: UUID,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> None:
         """Archive a session."""
         query = """
-            UPDATE sessions 
+            UPDATE sessions
             SET status = 'archived', ended_at = now()
             WHERE id = $1
         """
-        await db.execute(query, session_id)
+        await (conn or db).execute(query, session_id)
     
     @staticmethod
     async def update_last_message_time(session_id: UUID) -> None:
         """Update last message timestamp."""
-        query = "UPDATE sessions SET last_message_at = now() WHERE id = $1"
-        await db.execute(query, session_id)
+        await db.execute(_SESSION_TOUCH_SQL, session_id)
 
 
 class MessageRepository:
@@ -156,34 +442,63 @@ class MessageRepository:
         role: str,
         content: str,
         meta: Optional[Dict] = None
-    ) -> Dict[str, Any]:
+    ) -> asyncpg.Record:
         """Create new message."""
-        query = """
-            INSERT INTO messages (session_id, user_id, role, content, meta)
-            VALUES ($1, $2, $3, $4, $5)
-            RETURNING *
+        row = await db.fetchrow(_MESSAGE_INSERT_SQL, session_id, user_id, role, content, meta or {})
+        return row
+
+    @staticmethod
+    async def create_and_touch_session(
+        session_id: UUID,
+        user_id: UUID,
+        role: str,
+        content: str,
+        meta: Optional[Dict] = None
+    ) -> asyncpg.Record:
+        """Create a message and bump sessions.last_message_at in one statement.
+
+        Also maintains the sessions.message_count running counter; the
+        returned record carries it as 'session_message_count' so callers
+        can act on the new total without a COUNT(*) query. Replaces the
+        create + update_last_message_time pair on the message path.
         """
-        meta_json = json.dumps(meta or {})
-        row = await db.fetchrow(query, session_id, user_id, role, content, meta_json)
-        return dict(row)
+        row = await db.fetchrow(_MESSAGE_INSERT_TOUCH_SQL, session_id, user_id, role, content, meta or {})
+        return row
     
     @staticmethod
-    async def get_session_messages(session_id: UUID, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get messages for a session."""
-        query = """
-            SELECT * FROM messages 
-            WHERE session_id = $1
-            ORDER BY created_at ASC
-            LIMIT $2
+    async def create_many(
+        session_id: UUID,
+        user_id: UUID,
+        messages: List[Tuple[str, str, Optional[Dict]]]
+    ) -> None:
+        """Bulk-insert messages for one session via binary COPY.
+
+        Takes (role, content, meta) tuples and writes them in a single
+        COPY round trip, bypassing per-row Parse/Bind/Execute — meant for
+        history imports and other batch paths, not the per-message flow.
+        The per-connection jsonb codec handles the meta dicts.
         """
-        rows = await db.fetch(query, session_id, limit)
-        return [dict(row) for row in rows]
+        records = [
+            (session_id, user_id, role, content, meta or {})
+            for role, content, meta in messages
+        ]
+        async with db.acquire() as conn:
+            await conn.copy_records_to_table(
+                'messages',
+                records=records,
+                columns=['session_id', 'user_id', 'role', 'content', 'meta'],
+            )
+
+    @staticmethod
+    async def get_session_messages(session_id: UUID, limit: int = 50) -> List[asyncpg.Record]:
+        """Get messages for a session."""
+        rows = await db.fetch(_MESSAGE_LIST_SQL, session_id, limit)
+        return rows
     
     @staticmethod
     async def count_session_messages(session_id: UUID) -> int:
-        """Count messages in a session."""
-        query = "SELECT COUNT(*) FROM messages WHERE session_id = $1"
-        return await db.fetchval(query, session_id)
+        """Read the session's running message counter (O(1) lookup)."""
+        return await db.fetchval(_MESSAGE_COUNT_SQL, session_id) or 0
 
 
 class RiskEventRepository:
@@ -198,30 +513,29 @@ class RiskEventRepository:
         category: str,
         reasons: List[str],
         raw_detector_output: Dict
-    ) -> Dict[str, Any]:
+    ) -> asyncpg.Record:
         """Create new risk event."""
-        query = """
+        query = f"""
             INSERT INTO risk_events 
             (user_id, session_id, message_id, risk, category, reasons, raw_detector_output)
             VALUES ($1, $2, $3, $4, $5, $6, $7)
-            RETURNING *
+            RETURNING {_RISK_COLS}
         """
-        raw_json = json.dumps(raw_detector_output)
-        row = await db.fetchrow(query, user_id, session_id, message_id, 
-                               risk, category, reasons, raw_json)
-        return dict(row)
+        row = await db.fetchrow(query, user_id, session_id, message_id,
+                               risk, category, reasons, raw_detector_output)
+        return row
     
     @staticmethod
-    async def get_recent_high_risk(user_id: UUID, limit: int = 5) -> List[Dict[str, Any]]:
+    async def get_recent_high_risk(user_id: UUID, limit: int = 5) -> List[asyncpg.Record]:
         """Get recent high-risk events for user."""
-        query = """
-            SELECT * FROM risk_events 
+        query = f"""
+            SELECT {_RISK_COLS} FROM risk_events 
             WHERE user_id = $1 AND risk IN ('medium', 'high')
             ORDER BY created_at DESC
             LIMIT $2
         """
         rows = await db.fetch(query, user_id, limit)
-        return [dict(row) for row in rows]
+        return rows
 
 
 class MemoryRepository:
@@ -238,36 +552,36 @@ class MemoryRepository:
         triggers: List[str],
         helpful_strategies_used: List[str],
         next_session_goal: str
-    ) -> Dict[str, Any]:
+    ) -> asyncpg.Record:
         """Create memory summary."""
-        query = """
+        query = f"""
             INSERT INTO memory_summaries 
             (user_id, session_id, summary, main_topics, user_emotions, key_thoughts, 
              triggers, helpful_strategies_used, next_session_goal)
             VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-            RETURNING *
+            RETURNING {_SUMMARY_COLS}
         """
         row = await db.fetchrow(query, user_id, session_id, summary, main_topics,
                                user_emotions, key_thoughts, triggers, 
                                helpful_strategies_used, next_session_goal)
-        return dict(row)
+        return row
     
     @staticmethod
-    async def get_recent_summaries(user_id: UUID, limit: int = 3) -> List[Dict[str, Any]]:
+    async def get_recent_summaries(user_id: UUID, limit: int = 3) -> List[asyncpg.Record]:
         """Get recent memory summaries for user."""
-        query = """
-            SELECT * FROM memory_summaries 
+        query = f"""
+            SELECT {_SUMMARY_COLS} FROM memory_summaries 
             WHERE user_id = $1
             ORDER BY created_at DESC
             LIMIT $2
         """
         rows = await db.fetch(query, user_id, limit)
-        return [dict(row) for row in rows]
+        return rows
     
     @staticmethod
-    async def upsert_facts(user_id: UUID, facts: Dict[str, Any]) -> Dict[str, Any]:
+    async def upsert_facts(user_id: UUID, facts: Dict[str, Any]) -> asyncpg.Record:
         """Insert or update memory facts."""
-        query = """
+        query = f"""
             INSERT INTO memory_facts 
             (user_id, profile, stable_issues, values_and_goals, common_triggers, 
              cognitive_patterns, preferred_support_style, hard_limits)
@@ -282,11 +596,10 @@ class MemoryRepository:
                 preferred_support_style = EXCLUDED.preferred_support_style,
                 hard_limits = EXCLUDED.hard_limits,
                 updated_at = now()
-            RETURNING *
+            RETURNING {_FACTS_COLS}
         """
-        profile_json = json.dumps(facts.get('profile', {}))
         row = await db.fetchrow(
-            query, user_id, profile_json,
+            query, user_id, facts.get('profile', {}),
             facts.get('stable_issues', []),
             facts.get('values_and_goals', []),
             facts.get('common_triggers', []),
@@ -294,64 +607,56 @@ class MemoryRepository:
             facts.get('preferred_support_style', []),
             facts.get('hard_limits', [])
         )
-        return dict(row)
+        return row
     
     @staticmethod
-    async def get_facts(user_id: UUID) -> Optional[Dict[str, Any]]:
+    async def get_facts(user_id: UUID) -> Optional[asyncpg.Record]:
         """Get memory facts for user."""
-        query = "SELECT * FROM memory_facts WHERE user_id = $1"
+        query = f"SELECT {_FACTS_COLS} FROM memory_facts WHERE user_id = $1"
         row = await db.fetchrow(query, user_id)
-        return dict(row) if row else None
+        return row
 
 
 class UsageLimitRepository:
     """Repository for usage_limits table."""
     
     @staticmethod
-    async def get_or_create(user_id: UUID, daily_limit: int = 20) -> Dict[str, Any]:
-        """Get or create usage limit record."""
-        query = """
-            INSERT INTO usage_limits (user_id, daily_message_limit)
-            VALUES ($1, $2)
-            ON CONFLICT (user_id) DO NOTHING
-            RETURNING *
+    async def get_or_create(user_id: UUID, daily_limit: int = 20) -> asyncpg.Record:
+        """Get or create usage limit record.
+
+        The no-op DO UPDATE forces RETURNING to yield the existing row on
+        conflict, so no follow-up SELECT is needed.
         """
-        await db.execute(query, user_id, daily_limit)
-        
-        # Get the record (whether newly created or existing)
-        query = "SELECT * FROM usage_limits WHERE user_id = $1"
-        row = await db.fetchrow(query, user_id)
-        return dict(row)
+        row = await db.fetchrow(_USAGE_INSERT_SQL, user_id, daily_limit)
+        return row
     
     @staticmethod
-    async def increment_usage(user_id: UUID) -> Dict[str, Any]:
+    async def increment_usage(user_id: UUID) -> asyncpg.Record:
         """Increment daily message count, reset if new day."""
-        query = """
-            UPDATE usage_limits
-            SET 
-                daily_message_used = CASE 
-                    WHEN daily_reset_at < CURRENT_DATE THEN 1
-                    ELSE daily_message_used + 1
-                END,
-                daily_reset_at = CURRENT_DATE,
-                updated_at = now()
-            WHERE user_id = $1
-            RETURNING *
-        """
-        row = await db.fetchrow(query, user_id)
-        return dict(row)
+        row = await db.fetchrow(_USAGE_INCREMENT_SQL, user_id)
+        return row
     
     @staticmethod
-    async def check_limit(user_id: UUID) -> bool:
-        """Check if user has exceeded daily limit."""
-        limits = await UsageLimitRepository.get_or_create(user_id)
-        
-        # Reset if new day
-        if limits['daily_reset_at'] < date.today():
-            limits = await UsageLimitRepository.increment_usage(user_id)
-            return True
-        
-        return limits['daily_message_used'] < limits['daily_message_limit']
+    async def check_limit(user_id: UUID, daily_limit: int = 20) -> bool:
+        """Consume one message from the daily allowance, creating the row
+        and handling the daily reset in the same statement.
+
+        Returns True when the message fits within the limit. One round
+        trip replaces the previous get_or_create + increment pair.
+        """
+        row = await db.fetchrow(_USAGE_CONSUME_SQL, user_id, daily_limit)
+        return row['daily_message_used'] <= row['daily_message_limit']
+
+    @staticmethod
+    async def refund(user_id: UUID) -> None:
+        """Return the message consumed by check_limit to the daily allowance.
+
+        Called when the reply fails after the slot was already consumed —
+        a failed OpenAI call must not burn quota. The same-day guard makes
+        a refund that straddles midnight a no-op, since the allowance was
+        reset anyway.
+        """
+        await db.execute(_USAGE_REFUND_SQL, user_id)
 
 
 class LLMRequestRepository:
@@ -372,19 +677,38 @@ class LLMRequestRepository:
         status: str = "success",
         error_code: Optional[str] = None,
         error_message: Optional[str] = None
-    ) -> Dict[str, Any]:
+    ) -> asyncpg.Record:
         """Log LLM request."""
-        query = """
-            INSERT INTO llm_requests 
-            (user_id, session_id, message_id, provider, model, prompt_tokens, 
-             completion_tokens, total_tokens, latency_ms, cost_usd, status, 
-             error_code, error_message)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-            RETURNING *
-        """
         row = await db.fetchrow(
-            query, user_id, session_id, message_id, provider, model,
+            _LLM_REQUEST_INSERT_SQL, user_id, session_id, message_id, provider, model,
             prompt_tokens, completion_tokens, total_tokens, latency_ms,
             cost_usd, status, error_code, error_message
         )
-        return dict(row)
+        return row
+
+    @staticmethod
+    async def create_many(rows: List[Dict[str, Any]]) -> None:
+        """Log multiple LLM requests in a single round-trip.
+
+        Each dict takes the same keyword arguments as create(). Used by the
+        background write worker to coalesce the detector and main completion
+        logs produced by one turn.
+        """
+        query = """
+            INSERT INTO llm_requests
+            (user_id, session_id, message_id, provider, model, prompt_tokens,
+             completion_tokens, total_tokens, latency_ms, cost_usd, status,
+             error_code, error_message)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+        """
+        await db.executemany(query, [
+            (
+                r.get('user_id'), r.get('session_id'), r.get('message_id'),
+                r['provider'], r['model'], r.get('prompt_tokens'),
+                r.get('completion_tokens'), r.get('total_tokens'),
+                r.get('latency_ms'), r.get('cost_usd'),
+                r.get('status', 'success'), r.get('error_code'),
+                r.get('error_message')
+            )
+            for r in rows
+        ])
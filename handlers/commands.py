@@ -1,27 +1,60 @@
 """Command handlers for Telegram bot."""
+import sys
+from datetime import datetime, timezone
+from functools import lru_cache
+
 from telegram import Update, KeyboardButton, ReplyKeyboardMarkup
 from telegram.ext import ContextTypes
 from uuid import UUID
 
+from db.database import db
 from db.models import (
     UserRepository, UserSettingsRepository, SessionRepository,
     UsageLimitRepository
 )
-from utils.i18n import t, STRINGS
+from utils.i18n import t, STRINGS, SUPPORTED_LANGUAGES
 from utils.logger import logger
 
 
 # ---------------------------------------------------------------------------
-# All button labels across all languages (used in bot.py to register handlers)
+# Per-language texts precompiled at import time
 # ---------------------------------------------------------------------------
-ALL_BTN_NEW_SESSION = [v for v in STRINGS["btn_new_session"].values()]
-ALL_BTN_SETTINGS    = [v for v in STRINGS["btn_settings"].values()]
-ALL_BTN_STATS       = [v for v in STRINGS["btn_stats"].values()]
-ALL_BTN_HELP        = [v for v in STRINGS["btn_help"].values()]
+# /help is fully static per language
+_HELP_TEXT = {lang: STRINGS['help_text'][lang] for lang in SUPPORTED_LANGUAGES}
+
+# /settings output as one template — a single .format() per invocation
+# instead of five t() calls and string concatenations. The memory and
+# sensitive lines both use `{value}` upstream, so rename while joining.
+_SETTINGS_TEMPLATE = {
+    lang: (
+        STRINGS['settings_title'][lang]
+        + STRINGS['settings_style'][lang]
+        + STRINGS['settings_length'][lang]
+        + STRINGS['settings_memory'][lang].replace('{value}', '{memory}')
+        + STRINGS['settings_sensitive'][lang].replace('{value}', '{sensitive}')
+    )
+    for lang in SUPPORTED_LANGUAGES
+}
 
 
-def get_reply_keyboard(lang: str = 'ru') -> ReplyKeyboardMarkup:
-    """Persistent keyboard shown above the message input area."""
+# ---------------------------------------------------------------------------
+# Button label (any language) -> action name; bot.py maps actions to handlers
+# ---------------------------------------------------------------------------
+# Labels are interned so the dispatch dict, the keyboards and any other
+# holder of these strings share one object per label
+BTN_LABEL_TO_ACTION = {
+    sys.intern(label): action
+    for action, key in (
+        ('new_session', 'btn_new_session'),
+        ('settings', 'btn_settings'),
+        ('stats', 'btn_stats'),
+        ('help', 'btn_help'),
+    )
+    for label in STRINGS[key].values()
+}
+
+
+def _build_reply_keyboard(lang: str) -> ReplyKeyboardMarkup:
     keyboard = [
         [KeyboardButton(t(lang, 'btn_new_session'))],
         [KeyboardButton(t(lang, 'btn_settings')), KeyboardButton(t(lang, 'btn_stats'))],
@@ -30,14 +63,44 @@ def get_reply_keyboard(lang: str = 'ru') -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
 
 
-async def _get_lang(user_id_str: str | None) -> str:
-    """Load stored language for a user, defaulting to 'ru'."""
-    if not user_id_str:
+# The markup is immutable, so one instance per language serves every chat
+_KEYBOARDS = {lang: _build_reply_keyboard(lang) for lang in SUPPORTED_LANGUAGES}
+
+
+def get_reply_keyboard(lang: str = 'ru') -> ReplyKeyboardMarkup:
+    """Persistent keyboard shown above the message input area."""
+    return _KEYBOARDS.get(lang) or _KEYBOARDS['ru']
+
+
+@lru_cache(maxsize=1024)
+def _fmt_dt(epoch_minute: int) -> str:
+    """Minute-precision timestamp formatting, memoized per minute.
+
+    The output only changes once a minute, so repeated /stats presses
+    reuse the formatted string instead of re-running strftime.
+    """
+    return datetime.fromtimestamp(epoch_minute * 60, tz=timezone.utc).strftime('%d.%m.%Y %H:%M')
+
+
+def _require_user(context: ContextTypes.DEFAULT_TYPE) -> UUID | None:
+    """Return the cached user UUID, or None if /start hasn't run yet."""
+    return context.user_data.get('user_id')
+
+
+async def _get_lang(context: ContextTypes.DEFAULT_TYPE) -> str:
+    """Return the user's language, cached in user_data after first lookup."""
+    lang = context.user_data.get('lang')
+    if lang:
+        return lang
+    user_id = context.user_data.get('user_id')
+    if not user_id:
         return 'ru'
     try:
-        return await UserSettingsRepository.get_user_language(UUID(user_id_str))
+        lang = await UserSettingsRepository.get_user_language(user_id)
     except Exception:
         return 'ru'
+    context.user_data['lang'] = lang
+    return lang
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -46,7 +109,9 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
     try:
-        db_user = await UserRepository.create_or_update(
+        # One statement registers the user, default settings, usage limits
+        # and the active session, and returns the stored language
+        boot = await UserRepository.bootstrap_user(
             telegram_user_id=user.id,
             telegram_chat_id=chat_id,
             username=user.username,
@@ -55,73 +120,66 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             language_code=user.language_code or 'ru'
         )
 
-        user_id = db_user['id']
-
-        await UserSettingsRepository.create_default(user_id)
-        await UsageLimitRepository.get_or_create(user_id)
-
-        session = await SessionRepository.get_active(user_id)
-        if not session:
-            session = await SessionRepository.create(user_id)
-
-        context.user_data['user_id'] = str(user_id)
-        context.user_data['session_id'] = str(session['id'])
+        # Store parsed UUIDs — later handlers use them as-is instead of
+        # re-parsing a hex string on every command
+        user_id = boot['user_id']
+        context.user_data['user_id'] = user_id
+        context.user_data['session_id'] = boot['session_id']
 
-        lang = await UserSettingsRepository.get_user_language(user_id)
+        lang = boot['language']
+        context.user_data['lang'] = lang
 
         await update.message.reply_text(
             t(lang, 'welcome', name=user.first_name),
             reply_markup=get_reply_keyboard(lang)
         )
-        logger.info(f"User {user.id} started the bot")
+        logger.info("User %s started the bot", user.id)
 
     except Exception as e:
-        logger.error(f"Error in start_command: {e}")
+        logger.error("Error in start_command: %s", e)
         await update.message.reply_text(t('ru', 'start_error'))
 
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /help command."""
-    lang = await _get_lang(context.user_data.get('user_id'))
-    await update.message.reply_text(t(lang, 'help_text'), parse_mode='Markdown')
+    lang = await _get_lang(context)
+    await update.message.reply_text(_HELP_TEXT[lang], parse_mode='Markdown')
 
 
 async def newsession_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /newsession command - archive current session and create new one."""
-    lang = await _get_lang(context.user_data.get('user_id'))
+    lang = await _get_lang(context)
     try:
-        user_id_str = context.user_data.get('user_id')
-        if not user_id_str:
+        user_id = _require_user(context)
+        if not user_id:
             await update.message.reply_text(t(lang, 'please_start'))
             return
 
-        user_id = UUID(user_id_str)
-
-        current_session = await SessionRepository.get_active(user_id)
-        if current_session:
-            await SessionRepository.archive(current_session['id'])
+        # One pool acquire for the whole archive-and-create sequence
+        async with db.acquire() as conn:
+            current_session = await SessionRepository.get_active(user_id, conn=conn)
+            if current_session:
+                await SessionRepository.archive(current_session['id'], conn=conn)
 
-        new_session = await SessionRepository.create(user_id)
-        context.user_data['session_id'] = str(new_session['id'])
+            new_session = await SessionRepository.create(user_id, conn=conn)
+        context.user_data['session_id'] = new_session['id']
 
         await update.message.reply_text(t(lang, 'newsession_success'))
-        logger.info(f"User {user_id} started new session")
+        logger.info("User %s started new session", user_id)
 
     except Exception as e:
-        logger.error(f"Error in newsession_command: {e}")
+        logger.error("Error in newsession_command: %s", e)
         await update.message.reply_text(t(lang, 'newsession_error'))
 
 
 async def settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /settings command - show current settings."""
-    lang = await _get_lang(context.user_data.get('user_id'))
+    lang = await _get_lang(context)
     try:
-        user_id_str = context.user_data.get('user_id')
-        if not user_id_str:
+        user_id = _require_user(context)
+        if not user_id:
             await update.message.reply_text(t(lang, 'please_start'))
             return
-
-        user_id = UUID(user_id_str)
         settings = await UserSettingsRepository.get(user_id)
 
         if not settings:
@@ -131,45 +189,42 @@ async def settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         memory_val = t(lang, 'settings_memory_on' if settings['allow_memory'] else 'settings_memory_off')
         sensitive_val = t(lang, 'settings_sensitive_on' if settings['allow_sensitive_topics'] else 'settings_sensitive_off')
 
-        text = (
-            t(lang, 'settings_title')
-            + t(lang, 'settings_style', style=settings['preferred_style'])
-            + t(lang, 'settings_length', length=settings['response_length'])
-            + t(lang, 'settings_memory', value=memory_val)
-            + t(lang, 'settings_sensitive', value=sensitive_val)
+        text = _SETTINGS_TEMPLATE[lang].format(
+            style=settings['preferred_style'],
+            length=settings['response_length'],
+            memory=memory_val,
+            sensitive=sensitive_val,
         )
 
         await update.message.reply_text(text, parse_mode='Markdown')
 
     except Exception as e:
-        logger.error(f"Error in settings_command: {e}")
+        logger.error("Error in settings_command: %s", e)
         await update.message.reply_text(t(lang, 'settings_error'))
 
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /stats command - show usage statistics."""
-    lang = await _get_lang(context.user_data.get('user_id'))
+    lang = await _get_lang(context)
     try:
-        user_id_str = context.user_data.get('user_id')
-        if not user_id_str:
+        user_id = _require_user(context)
+        if not user_id:
             await update.message.reply_text(t(lang, 'please_start'))
             return
-
-        user_id = UUID(user_id_str)
         usage = await UsageLimitRepository.get_or_create(user_id)
         session = await SessionRepository.get_active(user_id)
 
-        text = (
-            t(lang, 'stats_title')
-            + t(lang, 'stats_today', used=usage['daily_message_used'], limit=usage['daily_message_limit'])
-            + t(lang, 'stats_remaining', remaining=usage['daily_message_limit'] - usage['daily_message_used'])
-        )
-
+        parts = [
+            t(lang, 'stats_title'),
+            t(lang, 'stats_today', used=usage['daily_message_used'], limit=usage['daily_message_limit']),
+            t(lang, 'stats_remaining', remaining=usage['daily_message_limit'] - usage['daily_message_used']),
+        ]
         if session:
-            text += t(lang, 'stats_session_started', date=session['started_at'].strftime('%d.%m.%Y %H:%M'))
+            parts.append(t(lang, 'stats_session_started',
+                           date=_fmt_dt(int(session['started_at'].timestamp()) // 60)))
 
-        await update.message.reply_text(text, parse_mode='Markdown')
+        await update.message.reply_text(''.join(parts), parse_mode='Markdown')
 
     except Exception as e:
-        logger.error(f"Error in stats_command: {e}")
+        logger.error("Error in stats_command: %s", e)
         await update.message.reply_text(t(lang, 'stats_error'))
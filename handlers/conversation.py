@@ -1,7 +1,10 @@
 """Conversation handler for user messages."""
+import asyncio
+import time
+from itertools import islice
+
 from telegram import Update
 from telegram.ext import ContextTypes
-from uuid import UUID
 
 from db.models import (
     UserRepository, UserSettingsRepository, SessionRepository,
@@ -15,12 +18,97 @@ from config import config
 from utils.i18n import t
 from utils.logger import logger
 
-# Language names for the system prompt instruction
-_LANG_NAMES = {
-    'ru': 'Russian',
-    'kz': 'Kazakh',
-    'en': 'English',
-}
+# Streaming edit batching: flush after N tokens (doubling up to the max) or
+# after the time budget elapses, whichever comes first. Keeps the number of
+# Telegram editMessageText calls bounded.
+_STREAM_FLUSH_TOKENS_INITIAL = 8
+_STREAM_FLUSH_TOKENS_MAX = 64
+_STREAM_FLUSH_INTERVAL = 0.4  # seconds
+
+# Fire-and-forget tasks stay referenced here until done — the event loop
+# only keeps weak references, so an unanchored task can be GC'd mid-flight
+_BG_TASKS: set = set()
+
+
+def _spawn_bg(coro) -> asyncio.Task:
+    """Run a coroutine in the background without blocking the handler."""
+    task = asyncio.create_task(coro)
+    _BG_TASKS.add(task)
+    task.add_done_callback(_BG_TASKS.discard)
+    return task
+
+
+async def _update_memory(user_id, session_id):
+    """Periodic memory refresh; runs off the reply path."""
+    try:
+        await memory_manager.update_memory(user_id, session_id)
+        logger.info("Memory updated for user %s", user_id)
+    except Exception as e:
+        logger.error("Failed to update memory: %s", e)
+
+
+async def _stream_and_send(
+    update: Update,
+    messages: list,
+    user_id,
+    session_id,
+    message_id,
+    allow_send: asyncio.Event,
+    stats: dict
+) -> str:
+    """
+    Stream a completion and forward it to Telegram with batched edits.
+
+    Tokens are accumulated from the moment the stream opens, but nothing is
+    sent to the chat until `allow_send` is set (the detector verdict), so the
+    stream can be launched speculatively and cancelled without side effects.
+    """
+    buffer = []
+    sent_text = ""
+    sent_message = None
+    flush_tokens = _STREAM_FLUSH_TOKENS_INITIAL
+    tokens_since_flush = 0
+    last_flush = time.monotonic()
+
+    async def _flush():
+        nonlocal sent_text, sent_message
+        text = "".join(buffer)
+        if not text or text == sent_text:
+            return
+        if sent_message is None:
+            sent_message = await update.message.reply_text(text)
+        else:
+            try:
+                await sent_message.edit_text(text)
+            except Exception:
+                # "message is not modified" and transient edit errors are
+                # harmless — the next flush or the final edit catches up
+                pass
+        sent_text = text
+
+    async for delta in ai_client.chat_completion_stream(
+        messages=messages,
+        user_id=user_id,
+        session_id=session_id,
+        message_id=message_id,
+        usage_stats=stats
+    ):
+        buffer.append(delta)
+        tokens_since_flush += 1
+
+        if not allow_send.is_set():
+            continue
+
+        now = time.monotonic()
+        if tokens_since_flush >= flush_tokens or (now - last_flush) >= _STREAM_FLUSH_INTERVAL:
+            await _flush()
+            tokens_since_flush = 0
+            last_flush = now
+            flush_tokens = min(flush_tokens * 2, _STREAM_FLUSH_TOKENS_MAX)
+
+    await allow_send.wait()
+    await _flush()
+    return "".join(buffer)
 
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -28,88 +116,98 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     user_message = update.message.text
 
+    # True between consuming a daily-limit slot and delivering the reply;
+    # any failure in that window gives the slot back
+    refund_on_error = False
+
     try:
-        # Get or create user
-        user_id_str = context.user_data.get('user_id')
-        if not user_id_str:
+        # Get or create user (user_data holds the UUID object directly)
+        user_id = context.user_data.get('user_id')
+        if not user_id:
             # Auto-register user
             db_user = await UserRepository.get_by_telegram_id(user.id)
             if not db_user:
                 await update.message.reply_text(t('ru', 'use_start_first'))
                 return
             user_id = db_user['id']
-            context.user_data['user_id'] = str(user_id)
-        else:
-            user_id = UUID(user_id_str)
+            context.user_data['user_id'] = user_id
 
-        # Load user language early so all error messages are correctly localised
-        lang = await UserSettingsRepository.get_user_language(user_id)
+        # Load user language early so all error messages are correctly
+        # localised — cached in user_data so it costs a dict lookup per message
+        lang = context.user_data.get('lang')
+        if not lang:
+            lang = await UserSettingsRepository.get_user_language(user_id)
+            context.user_data['lang'] = lang
 
-        # Check usage limits
+        # Check usage limits — consumes this message's slot in one round trip
         can_send = await UsageLimitRepository.check_limit(user_id)
         if not can_send:
+            # The consume statement already incremented past the limit —
+            # give the slot back so used stays capped and /stats never
+            # shows more than the daily allowance
+            await UsageLimitRepository.refund(user_id)
             await update.message.reply_text(t(lang, 'limit_reached'))
             return
+        refund_on_error = True
 
         # Get or create active session
         session = await SessionRepository.get_active(user_id)
         if not session:
             session = await SessionRepository.create(user_id)
-            context.user_data['session_id'] = str(session['id'])
+            context.user_data['session_id'] = session['id']
 
         session_id = session['id']
 
-        # Save user message
-        user_msg_record = await MessageRepository.create(
+        # Save user message and bump the session timestamp in one statement
+        user_msg_record = await MessageRepository.create_and_touch_session(
             session_id=session_id,
             user_id=user_id,
             role='user',
             content=user_message
         )
 
-        # Update session timestamp
-        await SessionRepository.update_last_message_time(session_id)
-
-        # Detect risk
-        need_crisis_mode, risk_result = await risk_detector.analyze(
+        # Kick off the independent reads concurrently: risk detection,
+        # settings and history don't depend on each other, so they overlap
+        # into roughly one round trip instead of three serial ones
+        detector_task = asyncio.create_task(risk_detector.analyze(
             user_message=user_message,
             user_id=user_id,
             session_id=session_id,
             message_id=user_msg_record['id']
+        ))
+        settings_task = asyncio.create_task(UserSettingsRepository.get(user_id))
+        history_task = asyncio.create_task(
+            MessageRepository.get_session_messages(session_id, limit=20)
         )
 
-        # Get user settings
-        settings = await UserSettingsRepository.get(user_id)
+        settings = await settings_task
         if not settings:
             settings = await UserSettingsRepository.create_default(user_id)
 
-        # Get memory context (if allowed and not in crisis mode)
+        # Get memory context speculatively (only used on the non-crisis path)
         memory_summary = None
-        memory_facts = None
-        if not need_crisis_mode and settings['allow_memory']:
-            memory_summary, memory_facts = await memory_manager.get_memory_context(user_id)
+        memory_facts_json = None
+        if settings['allow_memory']:
+            memory_summary, memory_facts_json = await memory_manager.get_memory_context(user_id)
 
-        # Build system prompt
-        system_prompt = prompt_manager.build_system_prompt(
-            crisis_mode=need_crisis_mode,
+        # Build the normal (non-crisis) system prompt — the common case.
+        # The reply-language instruction is baked in by the prompt cache
+        system_prompt, dynamic_context = prompt_manager.build_system_prompt(
+            crisis_mode=False,
             user_settings=settings,
             memory_summary=memory_summary,
-            memory_facts=memory_facts
+            memory_facts_json=memory_facts_json,
+            lang=lang
         )
 
-        # Append language instruction so GPT always replies in the user's chosen language
-        lang_name = _LANG_NAMES.get(lang, 'Russian')
-        system_prompt += f"\n\nIMPORTANT: Always reply in {lang_name}, regardless of the language the user writes in."
-
-        # Get recent conversation history
-        recent_messages = await MessageRepository.get_session_messages(session_id, limit=20)
-        conversation_history = []
-        for msg in recent_messages[:-1]:  # Exclude the message we just saved
-            if msg['role'] in ['user', 'assistant']:
-                conversation_history.append({
-                    'role': msg['role'],
-                    'content': msg['content']
-                })
+        # Recent conversation history, fetched concurrently above. islice
+        # skips the message we just saved without copying the record list
+        recent_messages = await history_task
+        conversation_history = [
+            {'role': msg['role'], 'content': msg['content']}
+            for msg in islice(recent_messages, len(recent_messages) - 1)
+            if msg['role'] in ('user', 'assistant')
+        ]
 
         # Add current user message
         conversation_history.append({
@@ -120,22 +218,68 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Format messages for API
         api_messages = prompt_manager.format_messages_for_openai(
             system_prompt=system_prompt,
-            conversation_history=conversation_history
+            conversation_history=conversation_history,
+            dynamic_context=dynamic_context
         )
 
         # Show typing indicator
         await update.message.chat.send_action("typing")
 
-        # Get AI response
-        ai_response, stats = await ai_client.chat_completion(
+        # Launch the main completion speculatively as a stream, then await the
+        # detector. Tokens are buffered until the detector clears sending, so
+        # on the common (non-crisis) path the user sees the reply growing
+        # after first-token latency instead of full-generation latency.
+        allow_send = asyncio.Event()
+        stats = {}
+        main_task = asyncio.create_task(_stream_and_send(
+            update=update,
             messages=api_messages,
             user_id=user_id,
             session_id=session_id,
-            message_id=user_msg_record['id']
-        )
+            message_id=user_msg_record['id'],
+            allow_send=allow_send,
+            stats=stats
+        ))
 
-        # Save assistant message
-        await MessageRepository.create(
+        need_crisis_mode, risk_result = await detector_task
+
+        if need_crisis_mode:
+            # Discard the speculative normal completion and re-issue with the
+            # crisis prompt
+            main_task.cancel()
+            try:
+                await main_task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+            crisis_prompt, crisis_context = prompt_manager.build_system_prompt(
+                crisis_mode=True,
+                user_settings=settings,
+                lang=lang
+            )
+            crisis_messages = prompt_manager.format_messages_for_openai(
+                system_prompt=crisis_prompt,
+                conversation_history=conversation_history,
+                dynamic_context=crisis_context
+            )
+            ai_response, stats = await ai_client.chat_completion(
+                messages=crisis_messages,
+                user_id=user_id,
+                session_id=session_id,
+                message_id=user_msg_record['id']
+            )
+            # Crisis replies are sent in one piece
+            await update.message.reply_text(ai_response)
+        else:
+            allow_send.set()
+            ai_response = await main_task
+
+        # The user has their reply — failures past this point (saving the
+        # assistant message, memory scheduling) must not refund the slot
+        refund_on_error = False
+
+        # Save assistant message (also keeps last_message_at current)
+        assistant_record = await MessageRepository.create_and_touch_session(
             session_id=session_id,
             user_id=user_id,
             role='assistant',
@@ -143,41 +287,32 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             meta={'crisis_mode': need_crisis_mode, 'risk': risk_result['risk']}
         )
 
-        # Send response to user
-        await update.message.reply_text(ai_response)
-
-        # Increment usage counter
-        await UsageLimitRepository.increment_usage(user_id)
-
-        # Create memory summary periodically
-        message_count = await MessageRepository.count_session_messages(session_id)
+        # Create memory summary periodically — the insert already returned
+        # the running session counter, no COUNT(*) round trip needed. The
+        # user never sees this work, so it runs fire-and-forget
+        message_count = assistant_record['session_message_count']
         if message_count % config.MEMORY_SUMMARY_EVERY_N_MESSAGES == 0:
-            try:
-                await memory_manager.create_session_summary(user_id, session_id)
-                await memory_manager.extract_and_update_facts(user_id, session_id)
-                logger.info(f"Memory updated for user {user_id}")
-            except Exception as e:
-                logger.error(f"Failed to update memory: {e}")
+            _spawn_bg(_update_memory(user_id, session_id))
 
         logger.info(
-            f"Message handled - user: {user.id}, "
-            f"lang: {lang}, "
-            f"crisis: {need_crisis_mode}, "
-            f"tokens: {stats.get('total_tokens', 0)}"
+            "Message handled - user: %s, lang: %s, crisis: %s, tokens: %s",
+            user.id, lang, need_crisis_mode, stats.get('total_tokens', 0)
         )
 
     except Exception as e:
-        logger.error(f"Error handling message: {e}", exc_info=True)
-        try:
-            lang = await UserSettingsRepository.get_user_language(UUID(context.user_data.get('user_id', '')))
-        except Exception:
-            lang = 'ru'
+        logger.error("Error handling message: %s", e, exc_info=True)
+        if refund_on_error:
+            try:
+                await UsageLimitRepository.refund(user_id)
+            except Exception as refund_error:
+                logger.error("Failed to refund usage slot: %s", refund_error)
+        lang = context.user_data.get('lang', 'ru')
         await update.message.reply_text(t(lang, 'conversation_error'))
 
 
 async def handle_error(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle errors in the bot."""
-    logger.error(f"Update {update} caused error: {context.error}", exc_info=context.error)
+    logger.error("Update %s caused error: %s", update, context.error, exc_info=context.error)
 
     if update and update.effective_message:
         await update.effective_message.reply_text(t('ru', 'unexpected_error'))
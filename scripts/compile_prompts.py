@@ -0,0 +1,50 @@
+"""Compile prompt markdown files into an importable Python module.
+
+Run as a pre-build/deploy step:
+
+    python scripts/compile_prompts.py
+
+Generates ai/_prompts_data.py with the prompt texts embedded as string
+constants, so worker startup does no filesystem I/O for prompts.
+PromptManager falls back to reading the .md files when the generated
+module is absent, so this step is optional for local development.
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import config
+
+# Attribute name in the generated module -> config path attribute
+PROMPTS = {
+    "SYSTEM_PROMPT": "SYSTEM_PROMPT_FILE",
+    "CRISIS_PROMPT": "CRISIS_PROMPT_FILE",
+    "DETECTOR_PROMPT": "DETECTOR_PROMPT_FILE",
+    "MEMORY_SUMMARY_PROMPT": "MEMORY_SUMMARY_PROMPT_FILE",
+    "MEMORY_FACT_EXTRACTOR_PROMPT": "MEMORY_FACT_EXTRACTOR_FILE",
+    "MEMORY_INSERT_TEMPLATE": "MEMORY_INSERT_PROMPT_FILE",
+}
+
+OUTPUT_FILE = Path(__file__).parent.parent / "ai" / "_prompts_data.py"
+
+
+def main() -> int:
+    lines = [
+        '"""Generated by scripts/compile_prompts.py — do not edit."""',
+        "",
+    ]
+    for const_name, config_attr in PROMPTS.items():
+        file_path = getattr(config, config_attr)
+        content = file_path.read_text(encoding="utf-8")
+        lines.append(f"{const_name} = {content!r}")
+        lines.append("")
+
+    OUTPUT_FILE.write_text("\n".join(lines), encoding="utf-8")
+    print(f"Wrote {OUTPUT_FILE} ({len(PROMPTS)} prompts)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
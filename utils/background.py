@@ -0,0 +1,91 @@
+"""Background processing for deferred database writes."""
+import asyncio
+from typing import Optional
+
+from db.models import LLMRequestRepository
+from utils.logger import logger
+
+# Bounded so a slow database can never back-pressure the request path;
+# overflow drops the write and logs instead
+_QUEUE_MAXSIZE = 10_000
+
+# Upper bound on how many queued writes one worker iteration drains
+_BATCH_MAX = 50
+
+db_write_queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_MAXSIZE)
+
+_worker_task: Optional[asyncio.Task] = None
+
+
+def enqueue_db_write(func, **kwargs) -> None:
+    """
+    Queue a repository coroutine function for background execution.
+
+    Used for non-critical writes (request logging, risk events) so the
+    user-visible reply path does not wait on a DB round-trip. On a full
+    queue the write is dropped with a warning rather than blocking.
+    """
+    try:
+        db_write_queue.put_nowait((func, kwargs))
+    except asyncio.QueueFull:
+        logger.warning("DB write queue full, dropping %s", func.__qualname__)
+
+
+async def _db_write_worker():
+    """Consume queued writes, coalescing bursts into batched statements.
+
+    Each turn enqueues up to two llm_requests inserts (detector + main
+    completion); draining everything already queued and folding the
+    llm_requests rows into one multi-row INSERT turns 2-3 round-trips
+    into one whenever writes arrive faster than the DB answers.
+    """
+    while True:
+        batch = [await db_write_queue.get()]
+        while len(batch) < _BATCH_MAX:
+            try:
+                batch.append(db_write_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+        llm_rows = []
+        try:
+            for func, kwargs in batch:
+                if func is LLMRequestRepository.create:
+                    llm_rows.append(kwargs)
+                    continue
+                try:
+                    await func(**kwargs)
+                except Exception as e:
+                    logger.error("Deferred DB write %s failed: %s", func.__qualname__, e)
+
+            if llm_rows:
+                try:
+                    await LLMRequestRepository.create_many(llm_rows)
+                except Exception as e:
+                    logger.error("Batched llm_requests write failed: %s", e)
+        finally:
+            for _ in batch:
+                db_write_queue.task_done()
+
+
+def start_db_write_worker() -> None:
+    """Start the background consumer (called from post_init)."""
+    global _worker_task
+    if _worker_task is None or _worker_task.done():
+        _worker_task = asyncio.create_task(_db_write_worker())
+        logger.info("DB write worker started")
+
+
+async def stop_db_write_worker() -> None:
+    """Drain pending writes and stop the consumer (called on shutdown)."""
+    global _worker_task
+    if _worker_task is None:
+        return
+    await db_write_queue.join()
+    _worker_task.cancel()
+    try:
+        await _worker_task
+    except asyncio.CancelledError:
+        pass
+    _worker_task = None
+    logger.info("DB write worker stopped")
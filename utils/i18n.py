@@ -6,13 +6,12 @@ Supported language codes:
     en  – English
 """
 
+from functools import lru_cache
 from typing import Any
 
-SUPPORTED_LANGUAGES = {
-    "ru": "🇷🇺 Русский",
-    "kz": "🇰🇿 Қазақша",
-    "en": "🇬🇧 English",
-}
+# Membership checks run on every translation; hash lookup on a frozenset.
+# Display names live with the language-selection keyboard in handlers.
+SUPPORTED_LANGUAGES = frozenset({"ru", "kz", "en"})
 
 # ---------------------------------------------------------------------------
 # All static bot strings, keyed by language then by string key
@@ -270,13 +269,24 @@ STRINGS: dict[str, dict[str, str]] = {
 }
 
 
-def t(lang: str, key: str, **kwargs: Any) -> str:
+@lru_cache(maxsize=2048)
+def _t_cached(lang: str, key: str, kwargs_items: tuple) -> str:
+    """Look up and format a string; memoized on (lang, key, kwargs)."""
+    entry = STRINGS.get(key, {})
+    text = entry.get(lang) or entry.get("ru", f"[missing: {key}]")
+    # format_map skips the ** re-packing that str.format would do
+    return text.format_map(dict(kwargs_items)) if kwargs_items else text
+
+
+def t(lang: str, key: str, _vars: dict | None = None, **kwargs: Any) -> str:
     """Return the translated string for *key* in *lang*, falling back to 'ru'.
 
-    Any keyword arguments are passed to str.format() on the result, so you can
-    do e.g. ``t(lang, 'welcome', name='Alice')``.
+    Format arguments go either as keywords — ``t(lang, 'welcome',
+    name='Alice')`` — or as a ready-made dict via ``_vars``, which saves the
+    kwargs dict allocation for callers that already hold one. Results are
+    memoized, so repeated renderings of the same string cost a dict lookup
+    instead of a format pass (format arguments must be hashable, which they
+    all are here).
     """
     lang = lang if lang in SUPPORTED_LANGUAGES else "ru"
-    entry = STRINGS.get(key, {})
-    text = entry.get(lang) or entry.get("ru", f"[missing: {key}]")
-    return text.format(**kwargs) if kwargs else text
+    return _t_cached(lang, key, tuple(sorted((_vars or kwargs).items())))
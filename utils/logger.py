@@ -1,56 +1,415 @@
 """Logging configuration for AI Psychologist Bot."""
-import logging
+import atexit
+import functools
+import gzip
+import os
+import queue
+import shutil
 import sys
+import threading
+from collections import deque
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+
+import logging
+from logging.handlers import (
+    QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+)
 
 from config import config
 
+# File-handler batching: records accumulate in a user-space buffer and go
+# to disk in one write() when it fills, when a WARNING+ record demands
+# durability, or on the periodic flush tick
+_STREAM_BUFFER_SIZE = 1 << 16  # 64 KiB
+_FLUSH_INTERVAL = 0.2  # seconds
 
-def setup_logger(name: str = "ai_psycholog") -> logging.Logger:
+# External-rotation mode: how many records between reopen checks. A
+# rotated file is picked up after at most this many writes.
+_REOPEN_CHECK_EVERY = 1000
+
+# Hoisted out of setup_logger — the level lookup, formatter and log
+# location are fixed for the process lifetime. The handler gets the file
+# path as a plain str so it skips PurePath normalization.
+_LEVEL = getattr(logging, config.LOG_LEVEL.upper(), logging.INFO)
+
+_LOG_DIR = Path("logs")
+if config.LOG_TO_FILE:
+    _LOG_DIR.mkdir(exist_ok=True)
+_LOG_FILE = str(_LOG_DIR / "bot.log")
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter specialized for this module's fixed record layout.
+
+    format() builds the line with an f-string instead of running the
+    %-style engine's per-record scan of the format string against the
+    record dict. The timestamp is reused within a second: the datefmt
+    has second precision, so records arriving in the same second would
+    repeat the identical localtime + strftime work, and one cached
+    string per second serves them all. Only the listener thread formats
+    records, so no locking is needed.
+    """
+
+    _last_second = -1
+    _last_asctime = ''
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        if second != self._last_second:
+            self._last_asctime = super().formatTime(record, datefmt)
+            self._last_second = second
+        return self._last_asctime
+
+    def format(self, record):
+        s = (f"{self.formatTime(record, self.datefmt)} - {record.name}"
+             f" - {record.levelname} - {record.getMessage()}")
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            s = f"{s}\n{record.exc_text}"
+        if record.stack_info:
+            s = f"{s}\n{self.formatStack(record.stack_info)}"
+        return s
+
+
+_FORMATTER = CachedTimeFormatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+class LazyLogger:
+    """Thin facade that gates each logging call on isEnabledFor.
+
+    For a disabled level the cost is one integer comparison instead of
+    Logger's full dispatch, and %-style arguments are never interpolated.
+    Everything else (handlers, level queries, the queue listener) passes
+    through to the wrapped logger.
+    """
+
+    __slots__ = ('_logger',)
+
+    def __init__(self, base: logging.Logger):
+        self._logger = base
+
+    def debug(self, msg, *args, **kwargs):
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        if self._logger.isEnabledFor(logging.INFO):
+            self._logger.info(msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        if self._logger.isEnabledFor(logging.WARNING):
+            self._logger.warning(msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._logger.error(msg, *args, **kwargs)
+
+    def exception(self, msg, *args, **kwargs):
+        self._logger.exception(msg, *args, **kwargs)
+
+    def critical(self, msg, *args, **kwargs):
+        if self._logger.isEnabledFor(logging.CRITICAL):
+            self._logger.critical(msg, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._logger, name)
+
+
+class PassthroughQueueHandler(QueueHandler):
+    """QueueHandler that enqueues records without formatting them.
+
+    The stock prepare() runs the formatter and message interpolation on
+    the caller's thread to make records picklable for multiprocess
+    queues. Ours is an in-process queue read by an in-process listener,
+    so all of that work can wait for the listener thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that coalesces records into batched writes.
+
+    The stream is opened in binary mode with a 64 KiB buffer — records
+    are encoded once at emit and skip the TextIOWrapper layer — and
+    emit() skips the per-record flush for records below WARNING; a
+    background thread flushes every 200 ms so the file stays tail-able
+    and nothing lingers in the buffer longer than that.
+
+    Rotation is decided from a byte counter maintained in-process — the
+    stock shouldRollover seeks to end-of-file on every emit, two wasted
+    syscalls per record for a size only this handler changes.
+
+    Rotated backups are gzip-compressed (level 1) by a background thread
+    so the ~50 MB of plain-text history shrinks roughly tenfold without
+    adding CPU work to the rollover itself; backups live as .N.gz and
+    are shifted alongside the stock rename chain.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._size = (os.path.getsize(self.baseFilename)
+                      if os.path.exists(self.baseFilename) else 0)
+        self._gzip_thread = None
+        self._flush_stop = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_loop, daemon=True, name='log-flush'
+        )
+        self._flusher.start()
+
+    def _open(self):
+        return open(self.baseFilename, self.mode + 'b',
+                    buffering=_STREAM_BUFFER_SIZE)
+
+    def _flush_loop(self):
+        while not self._flush_stop.wait(_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + self.terminator).encode('utf-8')
+            if self.maxBytes > 0 and self._size + len(data) >= self.maxBytes:
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(data)
+            self._size += len(data)
+            # Warnings and errors hit the disk immediately; routine
+            # records ride the buffer until the next tick
+            if record.levelno >= logging.WARNING:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self):
+        # Finish any in-flight compression first so the rename chains
+        # below see a stable set of files. Rollovers are 10 MB of logs
+        # apart, so this join virtually never waits.
+        if self._gzip_thread is not None:
+            self._gzip_thread.join()
+        # Shift compressed backups the way the stock chain shifts plain
+        # ones (.1.gz -> .2.gz, ...); the oldest is overwritten
+        if self.backupCount > 0:
+            for i in range(self.backupCount - 1, 0, -1):
+                sfn = f'{self.baseFilename}.{i}.gz'
+                if os.path.exists(sfn):
+                    dfn = f'{self.baseFilename}.{i + 1}.gz'
+                    os.replace(sfn, dfn)
+        super().doRollover()
+        self._size = 0
+        self._gzip_thread = threading.Thread(
+            target=self._gzip_last, daemon=True, name='log-gzip'
+        )
+        self._gzip_thread.start()
+
+    def _gzip_last(self):
+        plain = self.baseFilename + '.1'
+        try:
+            with open(plain, 'rb') as src, \
+                    gzip.open(plain + '.gz', 'wb', compresslevel=1) as dst:
+                shutil.copyfileobj(src, dst, _STREAM_BUFFER_SIZE)
+            os.remove(plain)
+        except OSError:
+            # Leave the plain backup in place — the stock rename chain
+            # still rotates it, the history is just uncompressed
+            pass
+
+    def close(self):
+        self._flush_stop.set()
+        super().close()
+
+
+class ExternalRotationFileHandler(WatchedFileHandler):
+    """File handler for deploys where logrotate(8) rotates the file.
+
+    In-process rotation pays a size check per record and holds the GIL
+    across renames; this variant just writes and lets logrotate do the
+    rest. The stock WatchedFileHandler stats the path on every emit to
+    notice the swap — here the check runs once per _REOPEN_CHECK_EVERY
+    records, so rotation is detected within a bounded number of writes
+    without a stat per record.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._since_check = 0
+
+    def emit(self, record):
+        try:
+            self._since_check += 1
+            if self._since_check >= _REOPEN_CHECK_EVERY:
+                self._since_check = 0
+                self.reopenIfNeeded()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+# LogRecord pool — every log call otherwise allocates a fresh record that
+# dies as soon as the listener has handled it. Handled records go back on
+# the deque and the factory reuses them (all attributes are rewritten by
+# __init__, so reuse is invisible to handlers).
+_RECORD_POOL: deque = deque(maxlen=1024)
+
+_BASE_RECORD_FACTORY = logging.getLogRecordFactory()
+
+
+def _pooled_record_factory(*args, **kwargs):
+    try:
+        record = _RECORD_POOL.pop()
+    except IndexError:
+        return _BASE_RECORD_FACTORY(*args, **kwargs)
+    record.__init__(*args, **kwargs)
+    return record
+
+
+class RecyclingQueueListener(QueueListener):
+    """QueueListener that returns handled records to the pool.
+
+    Recycling happens here — after every handler has run — because the
+    caller's thread parts with the record the moment it is enqueued.
+    deque.append/pop are atomic, so the listener and caller threads
+    share the pool without a lock.
+    """
+
+    def handle(self, record):
+        super().handle(record)
+        _RECORD_POOL.append(record)
+
+
+@functools.lru_cache(maxsize=32)
+def _setup_logger(name: str) -> logging.Logger:
     """
     Set up logger with console and file handlers.
-    
+
+    Memoized per name — repeat calls return the configured logger from
+    the cache without re-running any of the setup below. Callers go
+    through setup_logger(), which resolves the default name first so the
+    cache never sees two keys for the same logger.
+
+    The logger itself only holds a QueueHandler — each log call is one
+    queue put, and a background QueueListener thread runs the real console
+    and file handlers. Handler coroutines never block on file writes or
+    rotation checks.
+
     Args:
         name: Logger name
-        
+
     Returns:
         Configured logger instance
     """
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, config.LOG_LEVEL.upper()))
-    
-    # Prevent duplicate handlers
-    if logger.handlers:
-        return logger
-    
-    # Create formatters
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # File handler with rotation
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    
-    file_handler = RotatingFileHandler(
-        log_dir / "bot.log",
-        maxBytes=10 * 1024 * 1024,  # 10 MB
-        backupCount=5
+    logger.setLevel(_LEVEL)
+    # Records are recycled once OUR listener has handled them — propagation
+    # would hand the same record to root handlers (e.g. a library calling
+    # basicConfig) on the caller's thread while the listener may already be
+    # recycling it. All sinks for this logger are attached here anyway.
+    logger.propagate = False
+
+    # Console handler — only when someone is watching. With stdout
+    # redirected (systemd, docker) it would just format and write every
+    # record a second time; FORCE_CONSOLE_LOG=1 overrides for deploys
+    # that collect stdout deliberately, and with the file sink disabled
+    # stdout becomes the only sink, so it is always attached.
+    console_handler = None
+    if sys.stdout.isatty() or config.FORCE_CONSOLE_LOG or not config.LOG_TO_FILE:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(_FORMATTER)
+
+    # File handler — rotation either in-process or left to logrotate(8).
+    # Skipped entirely when the runtime collects stdout (LOG_TO_FILE=0).
+    handlers = [] if console_handler is None else [console_handler]
+    if config.LOG_TO_FILE:
+        if config.LOG_ROTATION_MODE == 'external':
+            file_handler = ExternalRotationFileHandler(_LOG_FILE)
+        else:
+            file_handler = BufferedRotatingFileHandler(
+                _LOG_FILE,
+                maxBytes=10 * 1024 * 1024,  # 10 MB
+                backupCount=5
+            )
+        # Aligned with the effective logger level — a DEBUG handler behind
+        # an INFO logger never fires, it only suggests the file captures more
+        file_handler.setLevel(_LEVEL)
+        file_handler.setFormatter(_FORMATTER)
+        handlers.append(file_handler)
+
+    # Real handlers run on the listener thread; the caller's thread only
+    # enqueues records. Stopping the listener at exit drains the queue.
+
+    # Handler.filter walks self.filters per record even when it's empty.
+    # Bake whatever is installed at setup time into one closure — with no
+    # filters that's a constant-true call, and any future filter chain
+    # costs one closure call instead of a list walk plus object dispatch.
+    for handler in handlers:
+        fns = tuple(f.filter if hasattr(f, 'filter') else f for f in handler.filters)
+        handler.filter = ((lambda record: True) if not fns else
+                          (lambda record, _fns=fns: all(fn(record) for fn in _fns)))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logging.setLogRecordFactory(_pooled_record_factory)
+    listener = RecyclingQueueListener(
+        log_queue, *handlers, respect_handler_level=True
     )
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(PassthroughQueueHandler(log_queue))
+    logger._listener = listener
+
     return logger
 
 
-# Global logger instance
-logger = setup_logger()
+def setup_logger(name: str = "ai_psycholog") -> logging.Logger:
+    """Return the memoized logger for `name`.
+
+    The default is applied here, not in the cached worker — lru_cache
+    keys on raw arguments, so setup_logger() and
+    setup_logger("ai_psycholog") must resolve to one cache entry or the
+    same logger ends up with two queue handlers and duplicate output.
+    """
+    return _setup_logger(name)
+
+
+def _noop(*args, **kwargs):
+    """Stand-in for logging methods whose level is disabled for the process."""
+
+
+# Module-level shortcuts: `from utils.logger import info` makes a log call
+# one global load with no attribute resolution. Levels below _LEVEL are
+# bound straight to a no-op, so a disabled `debug(...)` costs a single
+# call that returns immediately.
+_SHORTCUT_NAMES = ('debug', 'info', 'warning', 'error', 'exception', 'critical')
+
+
+# Global logger instance, materialized on first attribute access (PEP 562)
+# so merely importing this module — tests, scripts, introspection — doesn't
+# open the log file or start the listener and flush threads. The assignments
+# cache everything in the module dict, so later imports bypass this hook
+# entirely. The shortcuts bind the underlying logger's bound methods —
+# enabled levels skip even the LazyLogger facade.
+def __getattr__(name: str):
+    if name == 'logger' or name in _SHORTCUT_NAMES:
+        global logger, debug, info, warning, error, exception, critical
+        logger = LazyLogger(setup_logger())
+        base = logger._logger
+        debug = base.debug if _LEVEL <= logging.DEBUG else _noop
+        info = base.info if _LEVEL <= logging.INFO else _noop
+        warning = base.warning if _LEVEL <= logging.WARNING else _noop
+        error = base.error if _LEVEL <= logging.ERROR else _noop
+        exception = base.exception
+        critical = base.critical if _LEVEL <= logging.CRITICAL else _noop
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")